@@ -8,15 +8,13 @@ class TagRelatedField(serializers.RelatedField):
         return Tag.objects.all()
     
     def to_internal_value(self, data):
-        # get_or_create : 구하고자 하는 객체가 존재할 경우 객체를 불러오고, 
-        #                 존재하지 않을 경우 생성하는 method
-        #                 반환은 (object, created)로 튜플 형식으로 반환한다.
-        #                 object 부분은 구하고자 하는 객체 부분이고,
-        #                 created 부분은 인스턴스가 get_or_create에 의해 생성되면 True
-        #                 그렇지 않고 기존 DB에서 불러왔으면 False를 반환한다
-        tag, created = Tag.objects.get_or_create(tag=data, slug=data.lower())
-        
-        return tag
+        # Tags are only resolved to `Tag` rows once the whole list is known,
+        # by `Tag.objects.resolve` in `ArticleSerializer`. That takes a
+        # constant number of queries however many tags an article has.
+        if not isinstance(data, str) or not data:
+            raise serializers.ValidationError('Tags must be non-empty strings.')
+
+        return data
     
     def to_representation(self, value):
         return value.tag
\ No newline at end of file
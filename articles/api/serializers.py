@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from core.serializers import CompiledRepresentationMixin
 from profiles.api.serializers import ProfileSerializer
 
 from articles.models import Article, Comment, Tag
@@ -7,7 +8,9 @@ from .relations import TagRelatedField
 
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(
+    CompiledRepresentationMixin, serializers.ModelSerializer
+    ):
     author = ProfileSerializer(read_only=True)
     description = serializers.CharField(required=True)
 
@@ -48,12 +51,27 @@ class ArticleSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', [])
         article = Article.objects.create(author=author, **validated_data)
 
-        for tag in tags:
-            article.tags.add(tag)
+        if tags:
+            article.tags.add(*Tag.objects.resolve(tags))
         
         return article
         # return Article.objects.create(author=author, **validated_data)
 
+    def update(self, instance, validated_data):
+        tags = validated_data.pop('tags', None)
+
+        for (key, value) in validated_data.items():
+            setattr(instance, key, value)
+
+        instance.save()
+
+        # Only replace the tags when the request sent a `tagList`. An empty
+        # list removes them all.
+        if tags is not None:
+            instance.tags.set(Tag.objects.resolve(tags))
+
+        return instance
+
     def get_created_at(self, instance):
         return instance.created_at.isoformat()
     
@@ -65,18 +83,26 @@ class ArticleSerializer(serializers.ModelSerializer):
         
         if not request.user.is_authenticated:
             return False
+
+        # List views annotate the queryset with `with_favorites()`. Only fall
+        # back to a query per article when the annotation is missing.
+        favorited = getattr(instance, 'annotated_favorited', None)
+        if favorited is not None:
+            return favorited
                 
         return request.user.profile.has_favorited(instance)
     
     def get_favorites_count(self, instance):
-        return instance.favorited_by.count()
+        return instance.favorites_count
     
     def get_updated_at(self, instance):
         return instance.updated_at.isoformat()
 
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    CompiledRepresentationMixin, serializers.ModelSerializer
+    ):
     author = ProfileSerializer(required=False)
     
     createdAt = serializers.SerializerMethodField(method_name='get_created_at')
@@ -1,10 +1,16 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.dispatch import receiver
-from django.utils.text import slugify
 
-from core.utils import generate_random_string
+from core.pagination import invalidate_counts
+from core.utils import unique_slugify
 
-from articles.models import Article
+from articles.models import Article, Comment, FeedEntry, Tag, get_tag_id_cache
+from articles.search import get_search_backend
+from profiles.models import Profile
 
 
 @receiver(pre_save, sender=Article)
@@ -12,21 +18,114 @@ def add_slug_to_article_if_not_exists(sender, instance, *args, **kwargs):
     MAXIMUM_SLUG_LENGTH = 255
     
     if instance and not instance.slug:
-        slug = slugify(instance.title)
-        unique = generate_random_string()
-        
-        if len(slug) > MAXIMUM_SLUG_LENGTH:
-            slug = slug[:MAXIMUM_SLUG_LENGTH]
-        
-        while len(slug + '-' + unique) > MAXIMUM_SLUG_LENGTH:
-            parts = slug.split('-')
-            
-            if len(parts) is 1:
-                # The slug has no hypens. To append the unique string we must
-                # arbitrarly(임의로) remove 'len(unique)' characters from the end of
-                # 'slug'. Subtract one to account for extra hypen.
-                slug = slug[:MAXIMUM_SLUG_LENGTH - len(unique) -1]
-            else:
-                slug = '-'.join(parts[:-1])
-
-        instance.slug = slug + '-' + unique
+        # The suffix is unique without a SELECT. On the off chance that it is
+        # not, `Article.save` generates a new one and tries again.
+        instance.slug = unique_slugify(instance.title, MAXIMUM_SLUG_LENGTH)
+        instance._slug_was_generated = True
+
+
+@receiver(post_save, sender=Article)
+def add_article_to_follower_feeds(sender, instance, created, *args, **kwargs):
+    # Only new articles are fanned out. Edits do not change who should see
+    # the article or where it sits in the feed.
+    if created and FeedEntry.objects.is_enabled():
+        FeedEntry.objects.fan_out(instance)
+
+
+@receiver(m2m_changed, sender=Profile.follows.through)
+def sync_feed_with_follows(sender, instance, action, reverse, pk_set,
+                           *args, **kwargs):
+    if not FeedEntry.objects.is_enabled():
+        return
+
+    # `follower.follows.add(followee)` sends the follower as 'instance',
+    # while `followee.followed_by.add(follower)` sends the followee.
+    if reverse:
+        viewer_ids, author_ids = pk_set, [instance.pk]
+    else:
+        viewer_ids, author_ids = [instance.pk], pk_set
+
+    if action == 'post_add':
+        FeedEntry.objects.fill(viewer_ids, author_ids)
+    elif action == 'post_remove':
+        FeedEntry.objects.trim(viewer_ids, author_ids)
+    elif action == 'pre_clear':
+        # 'pk_set' is None when clearing, so drop every entry on our side.
+        if reverse:
+            FeedEntry.objects.trim(author_ids=author_ids)
+        else:
+            FeedEntry.objects.trim(viewer_ids=viewer_ids)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Comment)
+def invalidate_counts_on_save(sender, instance, created, *args, **kwargs):
+    # Editing an article can change which searches match it, so articles
+    # invalidate on every save. Comments only change counts when created.
+    if created or sender is Article:
+        invalidate_counts(sender)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Comment)
+def invalidate_counts_on_delete(sender, instance, *args, **kwargs):
+    invalidate_counts(sender)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Profile.favorites.through)
+@receiver(m2m_changed, sender=Profile.follows.through)
+def invalidate_article_counts(sender, action, *args, **kwargs):
+    # Article lists can be filtered by tag and by who favorited them, and the
+    # feed depends on who follows whom.
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_counts(Article)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, *args, **kwargs):
+    if created:
+        Article.objects.filter(pk=instance.article_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, *args, **kwargs):
+    # When the article itself is being deleted this matches no rows. Racing
+    # deletes of the same comment both get here, so never go below zero.
+    Article.objects.filter(pk=instance.article_id).update(
+        comments_count=Greatest(F('comments_count') - 1, 0)
+    )
+
+
+@receiver(post_save, sender=Article)
+def index_article_for_search(sender, instance, *args, **kwargs):
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Article)
+def remove_article_from_search(sender, instance, *args, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def invalidate_popular_tags_on_change(sender, action, *args, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Tag.objects.invalidate_popular()
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Tag)
+def invalidate_popular_tags_on_delete(sender, instance, *args, **kwargs):
+    # Deleting an article or a tag removes rows from the through table
+    # without sending `m2m_changed`.
+    Tag.objects.invalidate_popular()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def clear_tag_id_cache(sender, instance, *args, **kwargs):
+    # The old slug of a renamed tag is not known here, and tags change
+    # rarely, so forget every cached id.
+    get_tag_id_cache().clear()
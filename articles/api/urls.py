@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     ArticleViewSet, CommentsListCreateAPIView, CommentsDestroyAPIView,
-    ArticlesFavoriteAPIView, TagListAPIView, ArticlesFeedAPIView
+    ArticlesFavoriteAPIView, TagListAPIView, ArticlesFeedAPIView,
+    CommentsExportAPIView
 )
 
 # APPEND_SLASH=False : When use trailing_slash, you should put it in settings.
@@ -15,6 +16,7 @@ urlpatterns = [
     path('feed', ArticlesFeedAPIView.as_view()),
     path('', include(router.urls)),
     path('title/<slug:article_slug>/comments', CommentsListCreateAPIView.as_view()),
+    path('title/<slug:article_slug>/comments/export', CommentsExportAPIView.as_view()),
     path('title/<slug:article_slug>/comments/<int:comment_pk>', CommentsDestroyAPIView.as_view()),
     path('title/<slug:article_slug>/favorite', ArticlesFavoriteAPIView.as_view()),
     path('tags', TagListAPIView.as_view()),
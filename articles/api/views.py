@@ -1,6 +1,13 @@
+import hashlib
+import json
 from functools import partial
+from django.conf import settings
+from django.db.models import prefetch_related_objects
 from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import generics, mixins, status, viewsets
+from rest_framework.decorators import action
 from rest_framework import permissions
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound
@@ -10,11 +17,27 @@ from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 from rest_framework.views import APIView
 
-from articles.models import Article, Comment, Tag
+from articles.models import Article, Comment, FeedEntry, Tag
+from articles.search import get_search_backend
+from core.pagination import TimestampedPaginationMixin
+from core.utils import chunked
+from profiles.api.serializers import resolve_following
 from .renderers import ArticleJSONRenderer, CommentJSONRenderer
 from .serializers import ArticleSerializer, CommentSerializer, TagSerializer
 
 
+def _get_export_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 500)
+
+
+def _get_viewer_profile(request):
+    """Returns the profile of the requesting user, or None if anonymous."""
+    if request.user is None or not request.user.is_authenticated:
+        return None
+
+    return request.user.profile
+
+
 # CreateModelMixin  provides a ".create(request, *args, **kwargs)" method,
 # that implements creating and saving a new model instance.
 # If an object is created this returns a "201 Created" response, with a
@@ -22,6 +45,7 @@ from .serializers import ArticleSerializer, CommentSerializer, TagSerializer
 # If the representation contains a key named "url", then the "Location"
 # header of the response will be populated with that value.
 class ArticleViewSet(
+    TimestampedPaginationMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin, 
@@ -29,7 +53,9 @@ class ArticleViewSet(
     ):
     
     lookup_field = 'slug'
-    queryset = Article.objects.select_related('author', 'author__user')
+    queryset = Article.objects.select_related(
+        'author', 'author__user'
+    ).with_tags(names_only=True)
     permission_classes = (IsAuthenticatedOrReadOnly,)
     renderer_classes = (ArticleJSONRenderer,)
     serializer_class = ArticleSerializer
@@ -41,15 +67,27 @@ class ArticleViewSet(
         if author is not None:
             queryset = queryset.filter(author__user__username=author)
             
-        tag = self.request.query_params.get('tag', None)
-        if tag is not None:
-            queryset = queryset.filter(tags__tag=tag)
+        # `?tag=a&tag=b` matches articles with any of the tags, or with all
+        # of them when `tag_match=all` is given too.
+        tags = self.request.query_params.getlist('tag')
+        if tags:
+            queryset = queryset.tagged(
+                tags,
+                match_all=self.request.query_params.get('tag_match') == 'all'
+            )
         
         favorited_by = self.request.query_params.get('favorited', None)
         if favorited_by is not None:
             queryset = queryset.filter(
                 favorited_by__user__username=favorited_by
             )
+
+        # Full-text search over title, description and body. Results are
+        # ranked best match first, except in cursor pagination mode, which
+        # always orders by creation time.
+        query = self.request.query_params.get('q', '').strip()
+        if query:
+            queryset = get_search_backend().search(queryset, query)
         
         return queryset
         
@@ -72,7 +110,13 @@ class ArticleViewSet(
     def list(self, request):
         serializer_context = {'request': request}
         # serializer_instances = self.queryset.all()
-        page = self.paginate_queryset(self.get_queryset())
+        queryset = self.get_queryset().with_favorites(
+            _get_viewer_profile(request)
+        )
+        page = self.paginate_queryset(queryset)
+        resolve_following(
+            serializer_context, [article.author for article in page]
+        )
         serializer = self.serializer_class(
             # serializer_instances,
             page,
@@ -81,6 +125,36 @@ class ArticleViewSet(
         )
         return self.get_paginated_response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every article matching the list filters as one JSON document.
+        Rows are read and serialized `EXPORT_CHUNK_SIZE` at a time, so memory
+        use does not grow with the number of articles.
+        """
+        chunk_size = _get_export_chunk_size()
+        queryset = self.get_queryset().with_favorites(
+            _get_viewer_profile(request)
+        )
+
+        def serialize_chunks():
+            for page in chunked(queryset.iterator(chunk_size), chunk_size):
+                # `iterator()` ignores `prefetch_related()`, so prefetch
+                # tags chunk by chunk instead.
+                prefetch_related_objects(page, 'tags')
+                serializer_context = resolve_following(
+                    {'request': request}, [article.author for article in page]
+                )
+
+                yield self.serializer_class(
+                    page, context=serializer_context, many=True
+                ).data
+
+        return StreamingHttpResponse(
+            ArticleJSONRenderer().render_stream(serialize_chunks()),
+            content_type='application/json'
+        )
+    
     def retrieve(self, request, slug):
         serializer_context = {'request': request}
         try:
@@ -88,6 +162,8 @@ class ArticleViewSet(
         except Article.DoesNotExist:
             raise NotFound('An article with this slug does not exist.')
 
+        resolve_following(serializer_context, [serializer_instance.author])
+
         serializer = self.serializer_class(
             serializer_instance,
             context=serializer_context
@@ -116,7 +192,9 @@ class ArticleViewSet(
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CommentsListCreateAPIView(generics.ListCreateAPIView):
+class CommentsListCreateAPIView(
+    TimestampedPaginationMixin, generics.ListCreateAPIView
+    ):
     lookup_field = 'article__slug'
     lookup_url_kwarg = 'article_slug'
     permission_classes = (IsAuthenticatedOrReadOnly,)
@@ -138,6 +216,22 @@ class CommentsListCreateAPIView(generics.ListCreateAPIView):
         filters = {self.lookup_field: self.kwargs[self.lookup_url_kwarg]}
         
         return queryset.filter(**filters)
+
+    def list(self, request, article_slug=None):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        serializer_context = {'request': request}
+        resolve_following(
+            serializer_context, [comment.author for comment in page]
+        )
+        serializer = self.serializer_class(
+            page,
+            context=serializer_context,
+            many=True
+        )
+
+        return self.get_paginated_response(serializer.data)
     
     def post(self, request, article_slug=None):
         data = request.data
@@ -155,6 +249,33 @@ class CommentsListCreateAPIView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class CommentsExportAPIView(CommentsListCreateAPIView):
+    http_method_names = ['get', 'head', 'options']
+
+    def list(self, request, article_slug=None):
+        """
+        Stream every comment on the article as one JSON document, serializing
+        `EXPORT_CHUNK_SIZE` comments at a time.
+        """
+        chunk_size = _get_export_chunk_size()
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def serialize_chunks():
+            for page in chunked(queryset.iterator(chunk_size), chunk_size):
+                serializer_context = resolve_following(
+                    {'request': request}, [comment.author for comment in page]
+                )
+
+                yield self.serializer_class(
+                    page, context=serializer_context, many=True
+                ).data
+
+        return StreamingHttpResponse(
+            CommentJSONRenderer().render_stream(serialize_chunks()),
+            content_type='application/json'
+        )
+
+
 class CommentsDestroyAPIView(generics.DestroyAPIView):
     lookup_url_kwarg = 'comment_pk'
     permisssion_classes = (IsAuthenticatedOrReadOnly,)
@@ -214,6 +335,9 @@ class TagListAPIView(generics.ListAPIView):
     serializer_class = TagSerializer
 
     def list(self, request):
+        if 'popular' in request.query_params:
+            return self.list_popular(request)
+
         serializer_data = self.get_queryset()
         serializer = self.serializer_class(serializer_data, many=True)
 
@@ -221,23 +345,89 @@ class TagListAPIView(generics.ListAPIView):
             'tags': serializer.data
         }, status=status.HTTP_200_OK)
 
+    def list_popular(self, request):
+        """
+        `?popular=N` returns the N most used tags with their article counts.
+        The result is cached, and clients can revalidate it cheaply with
+        If-None-Match or If-Modified-Since.
+        """
+        default_limit = getattr(settings, 'POPULAR_TAGS_LIMIT', 20)
+
+        try:
+            limit = int(request.query_params['popular'] or default_limit)
+        except ValueError:
+            limit = default_limit
+
+        limit = min(max(limit, 1), 100)
+        version, tags = Tag.objects.popular(limit)
+        data = {
+            'tags': [
+                {'tag': tag, 'articlesCount': articles_count}
+                for tag, articles_count in tags
+            ]
+        }
 
-class ArticlesFeedAPIView(generics.ListAPIView):
+        # Derived from the payload, so every worker sends the same ETag for
+        # the same tags.
+        etag = '"{}"'.format(hashlib.sha1(
+            json.dumps(data).encode('utf-8')
+        ).hexdigest())
+        last_modified = version // 10 ** 9
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', None)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+
+        if if_none_match is not None:
+            not_modified = etag in [
+                value.strip() for value in if_none_match.split(',')
+            ]
+        else:
+            not_modified = if_modified_since is not None and \
+                last_modified <= if_modified_since
+
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+
+class ArticlesFeedAPIView(TimestampedPaginationMixin, generics.ListAPIView):
+    count_cache_vary_on_user = True
     permission_classes = (IsAuthenticated,)
     queryset = Article.objects.all()
     renderer_classes = (ArticleJSONRenderer,)
     serializer_class = ArticleSerializer
     
     def get_queryset(self):
-        return Article.objects.filter(
-            author__in=self.request.user.profile.follows.all()
-        )
+        queryset = Article.objects.select_related(
+            'author', 'author__user'
+        ).with_tags(names_only=True)
+        profile = self.request.user.profile
+
+        if FeedEntry.objects.is_enabled():
+            # Read the precomputed timeline: a range scan over the
+            # (viewer, created_at) index instead of a join against follows.
+            return queryset.filter(feed_entries__viewer=profile).order_by(
+                '-feed_entries__created_at', '-feed_entries__article_id'
+            )
+
+        return queryset.filter(author__in=profile.follows.all())
 
     def list(self, request):
-        queryset = self.get_queryset()
+        queryset = self.get_queryset().with_favorites(request.user.profile)
         page = self.paginate_queryset(queryset)
         
         serializer_context = {'request': request}
+        resolve_following(
+            serializer_context, [article.author for article in page]
+        )
         serializer = self.serializer_class(
             page,
             context=serializer_context,
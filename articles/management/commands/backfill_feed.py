@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized home feed from the current follows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of feed entries inserted per query.'
+        )
+        parser.add_argument(
+            '--viewers-per-transaction', type=int, default=500,
+            help='Number of feeds rebuilt in each transaction.'
+        )
+
+    def handle(self, *args, **options):
+        inserted = FeedEntry.objects.backfill(
+            batch_size=options['batch_size'],
+            viewers_per_transaction=options['viewers_per_transaction']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            'Inserted {} feed entries.'.format(inserted)
+        ))
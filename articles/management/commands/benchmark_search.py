@@ -0,0 +1,146 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from articles.models import Article
+from articles.search import ContainsSearchBackend, get_search_backend
+from authentication.models import User
+
+# Real text is mostly a few common words plus a long tail of rare ones, so
+# words are drawn with Zipf's law: the nth word is n times rarer than the
+# first. 'django' is in almost every article, 'term100' in a few percent and
+# 'term3000' in a handful.
+WORDS = [
+    'django', 'python', 'database', 'query', 'search', 'cache', 'request',
+    'response', 'model', 'view',
+] + ['term{}'.format(number) for number in range(5000)]
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Times article search on a throwaway set of generated articles: the '
+        'first page and the count of each query, with the configured backend '
+        'and with unranked substring matching. Everything it creates is '
+        'rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries', nargs='*',
+            default=['django', 'term100', 'term3000', 'python term100'],
+            help='Queries to time.'
+        )
+        parser.add_argument(
+            '--articles', type=int, default=100000,
+            help='Number of articles to generate.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of articles inserted and indexed per query.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of times each query is timed; the median is shown.'
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=20,
+            help='Number of results fetched per query.'
+        )
+
+    def handle(self, *args, **options):
+        if options['articles'] < 1 or options['batch_size'] < 1 or \
+                options['repeat'] < 1:
+            raise CommandError(
+                '--articles, --batch-size and --repeat must be at least 1.'
+            )
+
+        backends = [
+            ('configured', get_search_backend()),
+            ('substring', ContainsSearchBackend()),
+        ]
+
+        with transaction.atomic():
+            self.create_articles(options['articles'], options['batch_size'])
+
+            for query in options['queries']:
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    '== {!r}'.format(query)
+                ))
+
+                for name, backend in backends:
+                    queryset = backend.search(Article.objects.all(), query)
+                    page_time, count_time, count = self.time_query(
+                        queryset, options['page_size'], options['repeat']
+                    )
+
+                    self.stdout.write(
+                        '{:<12} {:>8} matches  page {:8.2f}ms  '
+                        'count {:8.2f}ms'.format(
+                            name, count, page_time * 1000, count_time * 1000
+                        )
+                    )
+
+            transaction.set_rollback(True)
+
+    def create_articles(self, total, batch_size):
+        author = User.objects.create_user(
+            username='benchmark-search',
+            email='benchmark-search@example.com',
+            password=None
+        ).profile
+        backend = get_search_backend()
+        rng = random.Random(0)
+        started_at = time.perf_counter()
+
+        def text(words):
+            return ' '.join(rng.choices(WORDS, WEIGHTS, k=words))
+
+        for start in range(0, total, batch_size):
+            stop = min(start + batch_size, total)
+
+            Article.objects.bulk_create([
+                Article(
+                    author=author,
+                    slug='benchmark-search-{}'.format(index),
+                    title=text(6),
+                    description=text(15),
+                    body=text(150),
+                )
+                for index in range(start, stop)
+            ])
+
+        # Bulk inserts send no signals, and only some databases report the
+        # primary keys of bulk inserts, so index what was inserted.
+        articles = Article.objects.filter(author=author).only(
+            'pk', 'title', 'description', 'body'
+        ).order_by('pk')
+
+        for start in range(0, total, batch_size):
+            backend.index(list(articles[start:start + batch_size]))
+
+        self.stdout.write('Created and indexed {} articles in {:.1f}s.'.format(
+            total, time.perf_counter() - started_at
+        ))
+
+    def time_query(self, queryset, page_size, repeat):
+        page_times = []
+        count_times = []
+        count = 0
+
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            list(queryset.all()[:page_size])
+            page_times.append(time.perf_counter() - started_at)
+
+            started_at = time.perf_counter()
+            count = queryset.all().count()
+            count_times.append(time.perf_counter() - started_at)
+
+        return (
+            statistics.median(page_times), statistics.median(count_times),
+            count
+        )
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from articles.api.views import (
+    ArticleViewSet, ArticlesFeedAPIView, CommentsListCreateAPIView,
+    TagListAPIView
+)
+from articles.models import Article, Comment, Tag
+from authentication.models import User
+from core.pagination import invalidate_counts
+from profiles.api.views import ProfileRetrieveAPIView
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests every hot endpoint once and prints the query plan of each '
+        'SELECT it runs, so that missing indexes and plan regressions show up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username', help='User to make requests as and filter by.'
+        )
+        parser.add_argument('--tag', help='Tag to filter articles by.')
+        parser.add_argument('--slug', help='Article to retrieve.')
+
+    def handle(self, *args, **options):
+        user = self.get_sample(
+            User.objects.order_by('pk'), 'username', options['username']
+        )
+        tag = self.get_sample(Tag.objects.order_by('pk'), 'tag', options['tag'])
+        article = self.get_sample(
+            Article.objects.order_by('pk'), 'slug', options['slug']
+        )
+
+        endpoints = [
+            ('articles', ArticleViewSet.as_view({'get': 'list'}), {}, {}),
+            ('articles by author', ArticleViewSet.as_view({'get': 'list'}),
+             {'author': user.username}, {}),
+            ('articles by tag', ArticleViewSet.as_view({'get': 'list'}),
+             {'tag': tag.tag}, {}),
+            ('articles favorited', ArticleViewSet.as_view({'get': 'list'}),
+             {'favorited': user.username}, {}),
+            ('article', ArticleViewSet.as_view({'get': 'retrieve'}),
+             {}, {'slug': article.slug}),
+            ('feed', ArticlesFeedAPIView.as_view(), {}, {}),
+            ('comments', CommentsListCreateAPIView.as_view(),
+             {}, {'article_slug': article.slug}),
+            ('profile', ProfileRetrieveAPIView.as_view(),
+             {}, {'username': user.username}),
+            ('tags', TagListAPIView.as_view(), {}, {}),
+        ]
+
+        # Cached counts would hide the COUNT queries.
+        invalidate_counts(Article)
+        invalidate_counts(Comment)
+
+        host = self.get_host()
+        factory = APIRequestFactory(SERVER_NAME=host, HTTP_HOST=host)
+        explain = connection.ops.explain_query_prefix()
+
+        for name, view, params, kwargs in endpoints:
+            request = factory.get('/', params)
+            force_authenticate(request, user=user)
+
+            with CaptureQueriesContext(connection) as queries:
+                view(request, **kwargs).render()
+
+            self.stdout.write(self.style.MIGRATE_HEADING('== ' + name))
+
+            for query in queries.captured_queries:
+                sql = query['sql']
+
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+
+                self.stdout.write(sql)
+
+                with connection.cursor() as cursor:
+                    cursor.execute('{} {}'.format(explain, sql))
+
+                    for row in cursor.fetchall():
+                        self.stdout.write(
+                            '    ' + ' '.join(str(column) for column in row)
+                        )
+
+                self.stdout.write('')
+
+    def get_host(self):
+        # Paginated responses build absolute next/previous links, which fail
+        # for hosts outside `ALLOWED_HOSTS`.
+        for host in settings.ALLOWED_HOSTS:
+            host = host.lstrip('.')
+
+            if host and '*' not in host:
+                return host
+
+        return 'localhost'
+
+    def get_sample(self, queryset, field, value):
+        if value is not None:
+            queryset = queryset.filter(**{field: value})
+
+        sample = queryset.first()
+
+        if sample is None:
+            raise CommandError(
+                'No {} to sample from. Pass one with --{} or add some data.'
+                .format(queryset.model._meta.verbose_name, field)
+            )
+
+        return sample
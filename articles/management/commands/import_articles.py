@@ -0,0 +1,229 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from articles.models import Article, FeedEntry, Tag
+from articles.search import get_search_backend
+from core.pagination import invalidate_counts
+from core.utils import unique_slugify
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports articles from a JSON Lines file, one article per line, '
+        'with the keys "author" (a username), "title", "description", "body" '
+        'and optionally "tagList" and "slug". Rows that are invalid, by '
+        'unknown authors or with a slug already taken are skipped and '
+        'reported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='File to import, or "-" to read standard input.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of articles inserted per transaction.'
+        )
+        parser.add_argument(
+            '--offset', type=int, default=0,
+            help='Number of lines to skip, to resume an interrupted import.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        offset = options['offset']
+        self.profile_ids = {}
+        imported = 0
+        skipped = 0
+        imported_through = offset
+        batch = []
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        source = sys.stdin if options['path'] == '-' \
+            else open(options['path'], encoding='utf-8')
+
+        with source:
+            line_number = 0
+
+            for line_number, line in enumerate(source, start=1):
+                if line_number <= offset or not line.strip():
+                    continue
+
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Rows read since the last batch are not imported yet.
+                    raise CommandError(
+                        'Line {} is not valid JSON. Fix it and resume with '
+                        '--offset {}.'.format(line_number, imported_through)
+                    )
+
+                error = self.validate(row)
+
+                if error is not None:
+                    self.skip(line_number, error)
+                    skipped += 1
+                    continue
+
+                batch.append((line_number, row))
+
+                if len(batch) >= batch_size:
+                    created, missing = self.import_batch(batch)
+                    imported, skipped = imported + created, skipped + missing
+                    batch = []
+                    imported_through = line_number
+                    self.report(imported, skipped, line_number)
+
+            if batch:
+                created, missing = self.import_batch(batch)
+                imported, skipped = imported + created, skipped + missing
+                self.report(imported, skipped, line_number)
+
+        # Bulk inserts send no signals, so do what the signals would have.
+        invalidate_counts(Article)
+        Tag.objects.invalidate_popular()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {} articles, skipped {}.'.format(imported, skipped)
+        ))
+
+    def report(self, imported, skipped, line_number):
+        self.stdout.write(
+            'Imported {} articles, skipped {} (resume with --offset {}).'
+            .format(imported, skipped, line_number)
+        )
+
+    def skip(self, line_number, reason):
+        self.stderr.write('Skipping line {}: {}.'.format(line_number, reason))
+
+    def validate(self, row):
+        """
+        Returns why 'row' cannot be imported, or None if it can. Rows are
+        checked before any of their batch is written, so that one bad row
+        does not fail the whole batch.
+        """
+        if not isinstance(row, dict):
+            return 'not a JSON object'
+
+        for key in ('author', 'title', 'description', 'body'):
+            if not isinstance(row.get(key), str) or not row[key]:
+                return '"{}" must be a non-empty string'.format(key)
+
+        if row.get('slug') is not None and not isinstance(row['slug'], str):
+            return '"slug" must be a string'
+
+        for key in ('title', 'slug'):
+            max_length = Article._meta.get_field(key).max_length
+
+            if len(row.get(key) or '') > max_length:
+                return '"{}" is longer than {} characters'.format(
+                    key, max_length
+                )
+
+        tags = row.get('tagList')
+
+        if tags is not None and not (
+            isinstance(tags, list) and
+            all(isinstance(name, str) and name for name in tags)
+        ):
+            return '"tagList" must be a list of non-empty strings'
+
+        return None
+
+    @transaction.atomic
+    def import_batch(self, rows):
+        """
+        Insert one batch of `(line_number, row)` articles with a constant
+        number of queries: authors, tags, articles and article-tag rows are
+        each written or looked up in bulk, and slugs are generated in
+        memory.
+        """
+        self.load_profile_ids(row['author'] for _, row in rows)
+        tags = {
+            tag.slug: tag for tag in Tag.objects.resolve([
+                name for _, row in rows for name in row.get('tagList') or []
+            ])
+        }
+        taken_slugs = set(Article.objects.filter(slug__in=[
+            row['slug'] for _, row in rows if row.get('slug')
+        ]).values_list('slug', flat=True))
+
+        articles = []
+        tag_slugs = []
+
+        for line_number, row in rows:
+            author_id = self.profile_ids.get(row['author'], None)
+
+            if author_id is None:
+                continue
+
+            slug = row.get('slug')
+
+            if slug and slug in taken_slugs:
+                self.skip(line_number, 'slug {!r} is taken'.format(slug))
+                continue
+
+            article = Article(
+                author_id=author_id,
+                slug=slug or unique_slugify(row['title']),
+                title=row['title'],
+                description=row['description'],
+                body=row['body'],
+            )
+            taken_slugs.add(article.slug)
+            articles.append(article)
+            tag_slugs.append({
+                name.lower() for name in row.get('tagList') or []
+            })
+
+        Article.objects.bulk_create(articles)
+
+        # Only some databases report the primary keys of bulk inserts.
+        if articles and articles[0].pk is None:
+            ids = dict(Article.objects.filter(
+                slug__in=[article.slug for article in articles]
+            ).values_list('slug', 'pk'))
+
+            for article in articles:
+                article.pk = ids[article.slug]
+
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article.pk, tag_id=tags[slug].pk)
+            for article, slugs in zip(articles, tag_slugs)
+            for slug in slugs
+        ], ignore_conflicts=True)
+
+        get_search_backend().index(articles)
+
+        if FeedEntry.objects.is_enabled():
+            FeedEntry.objects.fan_out_many(articles)
+
+        return len(articles), len(rows) - len(articles)
+
+    def load_profile_ids(self, usernames):
+        # Authors are remembered across batches, so each is looked up once.
+        missing = {
+            username for username in usernames
+            if username not in self.profile_ids
+        }
+
+        if not missing:
+            return
+
+        self.profile_ids.update(Profile.objects.filter(
+            user__username__in=missing
+        ).values_list('user__username', 'pk'))
+
+        for username in missing:
+            if username not in self.profile_ids:
+                self.profile_ids[username] = None
+                self.stderr.write(
+                    'No author named {!r}, skipping their articles.'
+                    .format(username)
+                )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the favorites_count and comments_count of every article '
+        'from the favorites and comments tables.'
+    )
+
+    def handle(self, *args, **options):
+        updated = Article.objects.reconcile_counters()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Reconciled counters of {} articles.'.format(updated)
+        ))
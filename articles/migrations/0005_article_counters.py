@@ -0,0 +1,50 @@
+# Generated by Django 3.2.8 on 2026-10-18 22:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('articles', 'Comment')
+    Profile = apps.get_model('profiles', 'Profile')
+
+    favorites = Profile.favorites.through.objects.filter(
+        article_id=OuterRef('pk')
+    ).order_by().values('article_id').annotate(
+        count=Count('pk')
+    ).values('count')
+
+    comments = Comment.objects.filter(
+        article_id=OuterRef('pk')
+    ).order_by().values('article_id').annotate(
+        count=Count('pk')
+    ).values('count')
+
+    Article.objects.update(
+        favorites_count=Coalesce(Subquery(favorites), Value(0)),
+        comments_count=Coalesce(Subquery(comments), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_feedentry'),
+        ('profiles', '0005_profile_favorites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE articles_article_fts '
+            'USING fts5(title, description, body)'
+        )
+        schema_editor.execute(
+            'INSERT INTO articles_article_fts (rowid, title, description, body) '
+            'SELECT id, title, description, body FROM articles_article'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX articles_article_search_idx ON articles_article '
+            "USING GIN (to_tsvector('english', "
+            "\"articles_article\".\"title\" || ' ' || "
+            "\"articles_article\".\"description\" || ' ' || "
+            "\"articles_article\".\"body\"))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE articles_article_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX articles_article_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.8 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_search'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='article',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at', '-id'], name='articles_ar_created_a3d32e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', '-created_at'], name='articles_ar_author__0bbe43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', '-created_at'], name='articles_co_article_c9d087_idx'),
+        ),
+        # Filtering articles by tag starts from the tag, but the through
+        # table's unique index starts from the article. This index covers the
+        # tag -> article lookup without touching the table.
+        migrations.RunSQL(
+            'CREATE INDEX articles_article_tags_tag_article_idx '
+            'ON articles_article_tags (tag_id, article_id)',
+            'DROP INDEX articles_article_tags_tag_article_idx',
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# `PostgresSearchBackend` searches `SearchVector('title', 'description',
+# 'body', config='english')`, which compiles to this expression. PostgreSQL
+# only uses an expression index for the very same expression, so the index
+# of `0006_article_search`, which had no COALESCE, is replaced.
+SEARCH_VECTOR = (
+    "to_tsvector('english'::regconfig, "
+    "COALESCE(\"title\", '') || ' ' || "
+    "COALESCE(\"description\", '') || ' ' || "
+    "COALESCE(\"body\", ''))"
+)
+
+OLD_SEARCH_VECTOR = (
+    "to_tsvector('english', "
+    "\"articles_article\".\"title\" || ' ' || "
+    "\"articles_article\".\"description\" || ' ' || "
+    "\"articles_article\".\"body\")"
+)
+
+
+def replace_search_index(expression):
+    def replace(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+
+        schema_editor.execute('DROP INDEX articles_article_search_idx')
+        schema_editor.execute(
+            'CREATE INDEX articles_article_search_idx ON articles_article '
+            'USING GIN ({})'.format(expression)
+        )
+
+    return replace
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            replace_search_index(SEARCH_VECTOR),
+            replace_search_index(OLD_SEARCH_VECTOR)
+        ),
+    ]
@@ -1,6 +1,123 @@
-from django.db import models
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 
 from core.models import TimestampedModel
+from core.utils import LRUCache, chunked
+from profiles.models import Profile
+
+
+_tag_id_cache = None
+
+
+def get_tag_id_cache():
+    """
+    Returns the per-process cache of tag ids keyed by slug, creating it from
+    the `TAG_ID_CACHE_*` settings on first use.
+    """
+    global _tag_id_cache
+
+    if _tag_id_cache is None:
+        _tag_id_cache = LRUCache(
+            max_size=getattr(settings, 'TAG_ID_CACHE_MAX_SIZE', 10000),
+            timeout=getattr(settings, 'TAG_ID_CACHE_TIMEOUT', 300)
+        )
+
+    return _tag_id_cache
+
+
+def collect_metrics():
+    """Yields the hit, miss and size metrics of the tag id cache."""
+    if _tag_id_cache is not None:
+        yield from _tag_id_cache.metrics('tag_id')
+
+
+class ArticleQuerySet(models.QuerySet):
+    def with_favorites(self, profile=None):
+        """
+        Annotate every article with whether 'profile' has favorited it.
+
+        'ArticleSerializer' reads this annotation instead of running an extra
+        query per article, which matters for list endpoints.
+        """
+        if profile is None:
+            return self.annotate(annotated_favorited=Value(False))
+
+        through = self.model.favorited_by.through
+
+        return self.annotate(
+            annotated_favorited=Exists(through.objects.filter(
+                article_id=OuterRef('pk'), profile_id=profile.pk
+            ))
+        )
+
+    def reconcile_counters(self):
+        """
+        Recompute `favorites_count` and `comments_count` from the underlying
+        rows in a single UPDATE, fixing any drift in the stored counters.
+        """
+        favorites = self.model.favorited_by.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by().values('article_id').annotate(
+            count=Count('pk')
+        ).values('count')
+
+        comments = Comment.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by().values('article_id').annotate(
+            count=Count('pk')
+        ).values('count')
+
+        return self.update(
+            favorites_count=Coalesce(Subquery(favorites), Value(0)),
+            comments_count=Coalesce(Subquery(comments), Value(0))
+        )
+
+    def tagged(self, names, match_all=False):
+        """
+        Filter to the articles tagged with any of 'names', or with every one
+        of them when 'match_all' is set. Names are matched on the indexed
+        slug, and the filter is a single semi-join on the through table, so
+        articles are never duplicated and the tag table is not scanned.
+        """
+        slugs = {name.lower() for name in names}
+        tag_ids = Tag.objects.ids_for_slugs(slugs)
+
+        if not tag_ids or (match_all and len(tag_ids) < len(slugs)):
+            return self.none()
+
+        matching = self.model.tags.through.objects.filter(
+            tag_id__in=tag_ids.values()
+        )
+
+        if match_all and len(tag_ids) > 1:
+            # Intersect by keeping the articles that matched every tag.
+            matching = matching.values('article_id').annotate(
+                matched=Count('tag_id')
+            ).filter(matched=len(tag_ids))
+
+        return self.filter(pk__in=matching.values('article_id'))
+
+    def with_tags(self, names_only=False):
+        """
+        Prefetch the tags of every article in one query instead of one query
+        per article. With 'names_only', only the `tag` column is loaded,
+        which is all `TagRelatedField` needs to render `tagList`.
+        """
+        if not names_only:
+            return self.prefetch_related('tags')
+
+        return self.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('tag'))
+        )
+
+
+SLUG_GENERATION_ATTEMPTS = 3
 
 
 # Create your models here.
@@ -24,9 +141,47 @@ class Article(TimestampedModel):
         'articles.Tag', related_name='articles'
     )
 
+    # Denormalized counters so that rendering an article never has to count
+    # rows in other tables. `Profile.favorite`/`Profile.unfavorite` and the
+    # comment signals keep them up to date with atomic `F()` updates, and
+    # `manage.py reconcile_article_counters` repairs them if they drift.
+    favorites_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    objects = ArticleQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    class Meta(TimestampedModel.Meta):
+        # Lists are sorted newest first, overall and per author. These indexes
+        # let the database read pages in order instead of sorting all rows.
+        # `id` is a cheaper tie-breaker than `updated_at`, and it is what
+        # cursor pagination orders by too.
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['author', '-created_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Slugs generated by `add_slug_to_article_if_not_exists` are unique in
+        # practice, but the database has the final say. If it rejects one,
+        # generate a new slug and try again rather than failing the request.
+        for attempt in range(SLUG_GENERATION_ATTEMPTS):
+            self._slug_was_generated = False
+
+            try:
+                with transaction.atomic():
+                    return super(Article, self).save(*args, **kwargs)
+            except IntegrityError:
+                if not self._slug_was_generated or \
+                        attempt == SLUG_GENERATION_ATTEMPTS - 1 or \
+                        not Article.objects.filter(slug=self.slug).exists():
+                    raise
+
+                self.slug = ''
+
 
 class Comment(TimestampedModel):
     body = models.TextField()
@@ -39,10 +194,275 @@ class Comment(TimestampedModel):
         'profiles.Profile', related_name='comments', on_delete=models.CASCADE
     )
 
+    class Meta(TimestampedModel.Meta):
+        # Comments are always listed per article, newest first.
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['article', '-created_at']),
+        ]
+
+
+def get_popular_tags_cache():
+    return caches[getattr(settings, 'POPULAR_TAGS_CACHE_ALIAS', 'default')]
+
+
+class TagManager(models.Manager):
+    POPULAR_VERSION_KEY = 'tags:popular:version'
+
+    def popular(self, limit):
+        """
+        Returns the 'limit' tags used by the most articles, with their article
+        counts, computed by a single aggregate query and cached until the
+        tags of any article change.
+
+        The result is a `(version, tags)` pair. 'version' is the `time_ns()`
+        of the last change, usable as a Last-Modified date. It is kept in the
+        `POPULAR_TAGS_CACHE_ALIAS` cache, which must be shared by every
+        worker for them to agree on it.
+        """
+        cache = get_popular_tags_cache()
+        version = cache.get(self.POPULAR_VERSION_KEY)
+
+        if version is None:
+            version = self.invalidate_popular()
+
+        key = 'tags:popular:{}:{}'.format(version, limit)
+        tags = cache.get(key)
+
+        if tags is None:
+            tags = list(self.get_queryset().annotate(
+                articles_count=Count('articles')
+            ).filter(articles_count__gt=0).order_by(
+                '-articles_count', 'tag'
+            ).values_list('tag', 'articles_count')[:limit])
+
+            cache.set(
+                key, tags, getattr(settings, 'POPULAR_TAGS_CACHE_TIMEOUT', 300)
+            )
+
+        return version, tags
+
+    def resolve(self, names):
+        """
+        Returns the tags named 'names', creating the ones that do not exist
+        yet. Existing tags are matched on their slug, the lower-cased name.
+        Takes one SELECT, plus one INSERT and one more SELECT only when some
+        tags are new. Concurrent requests creating the same tag do not fail
+        on the unique slug, since conflicting inserts are ignored.
+        """
+        tags_by_slug = OrderedDict()
+
+        for name in names:
+            tags_by_slug.setdefault(name.lower(), name)
+
+        existing = {
+            tag.slug: tag
+            for tag in self.get_queryset().filter(slug__in=tags_by_slug)
+        }
+        missing = [slug for slug in tags_by_slug if slug not in existing]
+
+        if missing:
+            self.bulk_create([
+                self.model(tag=tags_by_slug[slug], slug=slug)
+                for slug in missing
+            ], ignore_conflicts=True)
+
+            # Inserts that ignore conflicts do not report primary keys.
+            existing.update(
+                (tag.slug, tag)
+                for tag in self.get_queryset().filter(slug__in=missing)
+            )
+
+        return [existing[slug] for slug in tags_by_slug]
+
+    def ids_for_slugs(self, slugs):
+        """
+        Returns a `{slug: id}` dict of the existing tags among 'slugs'. Ids
+        are cached per process, so repeat lookups do not query the database;
+        unknown slugs are not cached, since the tag may be created later.
+        """
+        id_cache = get_tag_id_cache()
+        tag_ids = {}
+        missing = []
+
+        for slug in slugs:
+            tag_id = id_cache.get(slug)
+
+            if tag_id is None:
+                missing.append(slug)
+            else:
+                tag_ids[slug] = tag_id
+
+        if missing:
+            for slug, tag_id in self.get_queryset().filter(
+                slug__in=missing
+            ).values_list('slug', 'id'):
+                id_cache.set(slug, tag_id)
+                tag_ids[slug] = tag_id
+
+        return tag_ids
+
+    def invalidate_popular(self):
+        """Forget the cached popular tags and return the new version."""
+        version = time.time_ns()
+        get_popular_tags_cache().set(self.POPULAR_VERSION_KEY, version, None)
+
+        return version
+
 
 class Tag(TimestampedModel):
     tag = models.CharField(max_length=255)
     slug = models.SlugField(db_index=True, unique=True)
 
+    objects = TagManager()
+
     def __str__(self):
         return self.tag
+
+
+
+class FeedEntryManager(models.Manager):
+    """
+    Keeps the materialized home feed in sync. Every method works in bulk so
+    that following a prolific author or publishing to thousands of followers
+    costs a handful of queries rather than one per row.
+    """
+
+    def is_enabled(self):
+        """Returns True if the feed is served from this table."""
+        return getattr(settings, 'ARTICLES_FEED_STRATEGY', 'pull') == 'push'
+
+    def fan_out(self, article, batch_size=1000):
+        """Push 'article' into the feed of everyone following its author."""
+        self.fan_out_many([article], batch_size)
+
+    def fan_out_many(self, articles, batch_size=1000):
+        """Push each of 'articles' into the feeds of its author's followers."""
+        articles_by_author = {}
+
+        for article in articles:
+            articles_by_author.setdefault(article.author_id, []).append(article)
+
+        follows = Profile.follows.through.objects.filter(
+            to_profile_id__in=articles_by_author
+        ).values_list('from_profile_id', 'to_profile_id')
+
+        self._bulk_insert((
+            self.model(
+                viewer_id=viewer_id,
+                article_id=article.pk,
+                created_at=article.created_at
+            )
+            for viewer_id, author_id in follows.iterator()
+            for article in articles_by_author[author_id]
+        ), batch_size)
+
+    def fill(self, viewer_ids, author_ids, batch_size=1000):
+        """Add the articles of 'author_ids' to the feeds of 'viewer_ids'."""
+        articles = list(Article.objects.filter(
+            author_id__in=author_ids
+        ).order_by().values_list('pk', 'created_at'))
+
+        self._bulk_insert((
+            self.model(
+                viewer_id=viewer_id,
+                article_id=article_id,
+                created_at=created_at
+            )
+            for viewer_id in viewer_ids
+            for article_id, created_at in articles
+        ), batch_size)
+
+    def trim(self, viewer_ids=None, author_ids=None):
+        """
+        Remove articles by 'author_ids' from the feeds of 'viewer_ids'. Leaving
+        either argument out matches every viewer or every author.
+        """
+        entries = self.get_queryset()
+
+        if viewer_ids is not None:
+            entries = entries.filter(viewer_id__in=viewer_ids)
+
+        if author_ids is not None:
+            entries = entries.filter(article__author_id__in=author_ids)
+
+        entries.delete()
+
+    def backfill(self, batch_size=1000, viewers_per_transaction=500):
+        """
+        Rebuild every feed from scratch out of the current follows. Feeds
+        are rebuilt 'viewers_per_transaction' viewers at a time, each group
+        in its own transaction, so no feed is ever seen empty or half built
+        and a failure leaves every feed either old or rebuilt.
+        """
+        viewer_ids = list(
+            Profile.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        inserted = 0
+
+        for viewers in chunked(viewer_ids, viewers_per_transaction):
+            with transaction.atomic():
+                self.filter(viewer_id__in=viewers).delete()
+
+                rows = Article.objects.filter(
+                    author__followed_by__in=viewers
+                ).order_by().values_list(
+                    'author__followed_by', 'pk', 'created_at'
+                )
+
+                inserted += self._bulk_insert((
+                    self.model(
+                        viewer_id=viewer_id,
+                        article_id=article_id,
+                        created_at=created_at
+                    )
+                    for viewer_id, article_id, created_at in rows.iterator(
+                        chunk_size=batch_size
+                    )
+                ), batch_size)
+
+        return inserted
+
+    def _bulk_insert(self, entries, batch_size):
+        inserted = 0
+        batch = []
+
+        for entry in entries:
+            batch.append(entry)
+
+            if len(batch) >= batch_size:
+                self.bulk_create(batch, ignore_conflicts=True)
+                inserted += len(batch)
+                batch = []
+
+        if batch:
+            self.bulk_create(batch, ignore_conflicts=True)
+            inserted += len(batch)
+
+        return inserted
+
+
+class FeedEntry(models.Model):
+    # A row of the materialized home feed: `article` shows up in the feed of
+    # `viewer` because `viewer` follows its author. `created_at` is copied
+    # from the article so a feed page is a single range scan over the
+    # (viewer, created_at) index instead of a join against `follows`.
+    viewer = models.ForeignKey(
+        'profiles.Profile', related_name='feed_entries',
+        on_delete=models.CASCADE
+    )
+
+    article = models.ForeignKey(
+        'articles.Article', related_name='feed_entries',
+        on_delete=models.CASCADE
+    )
+
+    created_at = models.DateTimeField()
+
+    objects = FeedEntryManager()
+
+    class Meta:
+        unique_together = ('viewer', 'article')
+        indexes = [
+            models.Index(fields=['viewer', '-created_at']),
+        ]
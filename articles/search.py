@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+
+class SQLiteFTS5Backend:
+    """
+    Full-text search over an FTS5 virtual table whose rowids are article ids.
+    The table is created by the `0006_article_search` migration and kept in
+    sync by the signals in `articles.api.signals`.
+    """
+    table = 'articles_article_fts'
+
+    def index(self, articles):
+        ids = [article.pk for article in articles]
+
+        with connection.cursor() as cursor:
+            self._delete(cursor, ids)
+            cursor.executemany(
+                'INSERT INTO {} (rowid, title, description, body) '
+                'VALUES (%s, %s, %s, %s)'.format(self.table),
+                [
+                    (article.pk, article.title, article.description,
+                     article.body)
+                    for article in articles
+                ]
+            )
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, ids)
+
+    def search(self, queryset, query):
+        """
+        Narrow 'queryset' to articles matching 'query', best matches first.
+        Every word in 'query' must appear in the title, description or body.
+        """
+        match = ' '.join(
+            '"{}"'.format(term.replace('"', '""')) for term in query.split()
+        )
+        article_table = queryset.model._meta.db_table
+
+        # Join the FTS table once, so that bm25() ranks each match in the
+        # same pass that finds it. bm25() is lower for better matches.
+        # Matches in the title weigh more than in the description, which
+        # weigh more than in the body.
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                '"{0}" MATCH %s'.format(self.table),
+                '"{0}"."rowid" = "{1}"."id"'.format(self.table, article_table),
+            ],
+            params=[match],
+            select={
+                'search_rank': 'bm25("{}", 10.0, 5.0, 1.0)'.format(self.table)
+            },
+        ).order_by('search_rank', '-created_at')
+
+    def _delete(self, cursor, ids):
+        cursor.executemany(
+            'DELETE FROM {} WHERE rowid = %s'.format(self.table),
+            [(pk,) for pk in ids]
+        )
+
+
+class PostgresSearchBackend:
+    """
+    Full-text search with `django.contrib.postgres.search`, backed by the GIN
+    expression index created by the `0008_article_search_vector` migration.
+    PostgreSQL keeps that index up to date itself, so `index` and `remove`
+    do nothing.
+    """
+    config = 'english'
+
+    def index(self, articles):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def get_vector(self):
+        """
+        The document searched. It compiles to exactly the expression of the
+        index, which PostgreSQL only uses when the two are the same.
+        """
+        # Imported here because it needs psycopg2, which only PostgreSQL
+        # deployments have.
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector(
+            'title', 'description', 'body', config=self.config
+        )
+
+    def search(self, queryset, query):
+        """
+        Narrow 'queryset' to articles matching 'query', best matches first.
+        """
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        vector = self.get_vector()
+        search_query = SearchQuery(query, config=self.config)
+
+        return queryset.alias(search_vector=vector).filter(
+            search_vector=search_query
+        ).annotate(
+            search_rank=SearchRank(vector, search_query)
+        ).order_by('-search_rank', '-created_at')
+
+
+class ContainsSearchBackend:
+    """
+    Unranked search with case-insensitive substring matches, for databases
+    without a full-text backend here. There is no index to maintain, so
+    `index` and `remove` do nothing.
+    """
+
+    def index(self, articles):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def search(self, queryset, query):
+        """
+        Narrow 'queryset' to articles matching 'query', newest first. Every
+        word in 'query' must appear in the title, description or body.
+        """
+        for term in query.split():
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term) |
+                Q(body__icontains=term)
+            )
+
+        return queryset.order_by('-created_at', '-id')
+
+
+_BACKENDS_BY_VENDOR = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    """
+    Returns the backend named by `ARTICLES_SEARCH_BACKEND`, or the one that
+    matches the default database when that setting is None. Databases with
+    no full-text backend get `ContainsSearchBackend`.
+    """
+    path = getattr(settings, 'ARTICLES_SEARCH_BACKEND', None)
+
+    if path is not None:
+        return import_string(path)()
+
+    return _BACKENDS_BY_VENDOR.get(connection.vendor, ContainsSearchBackend)()
@@ -0,0 +1,273 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from articles.models import SLUG_GENERATION_ATTEMPTS, Article, Tag
+from authentication.models import User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email='{}@example.com'.format(username),
+        password='password1234'
+    )
+
+
+def create_articles(author, count, tags=('django', 'python')):
+    articles = []
+
+    for index in range(count):
+        article = Article.objects.create(
+            author=author.profile,
+            title='Article {}'.format(index),
+            description='Description',
+            body='Body'
+        )
+        article.tags.add(*Tag.objects.resolve(tags))
+        articles.append(article)
+
+    return articles
+
+
+class ArticleListQueryCountTests(APITestCase):
+    """
+    Listing articles must take the same number of queries however many
+    articles are on the page. Each case runs once with a few articles and
+    once with a full page, so an N+1 query makes one of them fail.
+    """
+
+    SIZES = (2, 20)
+
+    def setUp(self):
+        self.viewer = create_user('viewer')
+        self.author = create_user('author')
+        self.viewer.profile.follow(self.author.profile)
+        self.client.force_authenticate(self.viewer)
+
+    def create_page(self, count):
+        for article in create_articles(self.author, count):
+            self.viewer.profile.favorite(article)
+
+    def assertListQueries(self, url, num):
+        for size in self.SIZES:
+            with self.subTest(size=size):
+                Article.objects.all().delete()
+                self.create_page(size)
+
+                with self.assertNumQueries(num):
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), size)
+
+    def test_list_query_count_is_constant(self):
+        # COUNT, articles with the favorited flag, tags and follows.
+        self.assertListQueries('/articles/title', 4)
+
+    def test_feed_query_count_is_constant(self):
+        # Follows are joined into the COUNT and article queries.
+        self.assertListQueries('/articles/feed', 4)
+
+
+class ArticleSlugTests(TestCase):
+    def setUp(self):
+        self.author = create_user('author')
+
+    def create_article(self, title='Same title'):
+        return Article.objects.create(
+            author=self.author.profile,
+            title=title,
+            description='Description',
+            body='Body'
+        )
+
+    def test_same_title_gets_distinct_slugs(self):
+        slugs = [self.create_article().slug for _ in range(200)]
+
+        self.assertEqual(len(set(slugs)), len(slugs))
+        self.assertTrue(all(slug.startswith('same-title-') for slug in slugs))
+
+    def test_suffix_collision_is_retried(self):
+        with mock.patch(
+            'core.utils.generate_unique_suffix', return_value='taken'
+        ):
+            first = self.create_article()
+
+        with mock.patch(
+            'core.utils.generate_unique_suffix',
+            side_effect=['taken', 'taken', 'free']
+        ) as generate:
+            second = self.create_article()
+
+        self.assertEqual(first.slug, 'same-title-taken')
+        self.assertEqual(second.slug, 'same-title-free')
+        self.assertEqual(generate.call_count, 3)
+        self.assertEqual(
+            Article.objects.get(pk=second.pk).slug, 'same-title-free'
+        )
+
+    def test_gives_up_after_too_many_collisions(self):
+        with mock.patch(
+            'core.utils.generate_unique_suffix', return_value='taken'
+        ) as generate:
+            self.create_article()
+            generate.reset_mock()
+
+            with self.assertRaises(IntegrityError):
+                self.create_article()
+
+        self.assertEqual(generate.call_count, SLUG_GENERATION_ATTEMPTS)
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_explicit_slug_collision_is_not_retried(self):
+        self.create_article()
+        existing = Article.objects.get()
+
+        with mock.patch('core.utils.generate_unique_suffix') as generate:
+            with self.assertRaises(IntegrityError):
+                Article.objects.create(
+                    author=self.author.profile,
+                    slug=existing.slug,
+                    title='Other title',
+                    description='Description',
+                    body='Body'
+                )
+
+        generate.assert_not_called()
+
+
+class ArticleSearchTests(APITestCase):
+    def setUp(self):
+        self.author = create_user('author')
+        self.other = create_user('other')
+
+    def create_article(self, author, title='Title', description='Description',
+                       body='Body'):
+        return Article.objects.create(
+            author=author.profile,
+            title=title,
+            description=description,
+            body=body
+        )
+
+    def search(self, params):
+        response = self.client.get('/articles/title', params)
+        self.assertEqual(response.status_code, 200)
+
+        return [article['slug'] for article in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        in_body = self.create_article(self.author, body='All about pelicans')
+        in_title = self.create_article(self.author, title='Pelicans')
+        in_description = self.create_article(
+            self.author, description='Pelicans, mostly'
+        )
+        self.create_article(self.author, title='Herons')
+
+        self.assertEqual(self.search({'q': 'pelicans'}), [
+            in_title.slug, in_description.slug, in_body.slug
+        ])
+
+    def test_every_word_must_match(self):
+        both = self.create_article(self.author, title='Brown pelicans')
+        self.create_article(self.author, title='Brown herons')
+
+        self.assertEqual(self.search({'q': 'brown pelicans'}), [both.slug])
+
+    def test_combines_with_filters(self):
+        mine = self.create_article(self.author, title='Pelicans')
+        self.create_article(self.other, title='Pelicans')
+
+        # COUNT, ranked articles and tags: the rank comes from the join, not
+        # a query per article.
+        with self.assertNumQueries(3):
+            slugs = self.search({'q': 'pelicans', 'author': 'author'})
+
+        self.assertEqual(slugs, [mine.slug])
+
+    def test_query_syntax_is_not_interpreted(self):
+        article = self.create_article(self.author, title='Pelicans')
+
+        self.assertEqual(self.search({'q': 'pelicans"'}), [article.slug])
+        self.assertEqual(self.search({'q': 'NOT pelicans'}), [])
+
+
+class ImportArticlesTests(TestCase):
+    def setUp(self):
+        self.author = create_user('author')
+
+    def import_lines(self, lines, *args):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        self.addCleanup(os.remove, path)
+
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(
+                line if isinstance(line, str) else json.dumps(line)
+                for line in lines
+            ))
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_articles', path, *args, stdout=stdout, stderr=stderr
+        )
+
+        return stdout.getvalue(), stderr.getvalue()
+
+    def row(self, **fields):
+        return dict({
+            'author': 'author',
+            'title': 'Title',
+            'description': 'Description',
+            'body': 'Body',
+        }, **fields)
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        Article.objects.create(
+            author=self.author.profile, slug='taken', title='Title',
+            description='Description', body='Body'
+        )
+
+        stdout, stderr = self.import_lines([
+            self.row(tagList=['one']),
+            {'author': 'author', 'title': 'Title', 'body': 'Body'},
+            self.row(tagList=None),
+            self.row(tagList='one'),
+            self.row(tagList=[1]),
+            self.row(slug='taken'),
+            self.row(slug='new'),
+            self.row(slug='new'),
+            self.row(author='nobody'),
+            ['not', 'an', 'object'],
+        ])
+
+        self.assertIn('Imported 3 articles, skipped 7.', stdout)
+        self.assertIn('line 2: "description" must be', stderr)
+        self.assertIn('line 4: "tagList" must be', stderr)
+        self.assertIn('line 5: "tagList" must be', stderr)
+        self.assertIn("line 6: slug 'taken' is taken", stderr)
+        self.assertIn("line 8: slug 'new' is taken", stderr)
+        self.assertIn("No author named 'nobody'", stderr)
+        self.assertIn('line 10: not a JSON object', stderr)
+        self.assertEqual(Article.objects.count(), 4)
+        self.assertEqual(
+            list(Article.objects.get(slug='new').tags.all()), []
+        )
+
+    def test_invalid_json_names_the_offset_to_resume_from(self):
+        lines = [self.row()] * 3 + ['{'] + [self.row()]
+
+        with self.assertRaisesMessage(
+            CommandError,
+            'Line 4 is not valid JSON. Fix it and resume with --offset 2.'
+        ):
+            self.import_lines(lines, '--batch-size', '2')
+
+        self.assertEqual(Article.objects.count(), 2)
@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from profiles.models import Profile
 
+from authentication.backends import invalidate_cached_user
 from authentication.models import User
 
 # 앞서 profile 모델에서 'User' 모델과 'Profile' 모델 사이를 One-to-One 관계로
@@ -20,4 +21,19 @@ def create_related_profile(sender, instance, created, *args, **kwargs):
     # has a profile.
     
     if instance and created:
-        instance.profile = Profile.objects.create(user=instance)
\ No newline at end of file
+        instance.profile = Profile.objects.create(user=instance)
+
+
+# `JWTAuthentication` may cache users and their profiles. Any change to
+# either, including deactivating the user, must evict the cached copy so the
+# next request sees it.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_change(sender, instance, *args, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile_on_change(sender, instance, *args, **kwargs):
+    invalidate_cached_user(instance.user_id)
@@ -1,8 +1,60 @@
+import copy
+
 import jwt
 from django.conf import settings
 from rest_framework import authentication, exceptions
+
+from core.utils import LRUCache
 from .models import User
 
+_user_cache = None
+_token_cache = None
+
+
+def get_user_cache():
+    """
+    Returns the per-process cache of `(user, profile)` pairs keyed by user
+    id, creating it from the `JWT_USER_CACHE_*` settings on first use.
+    """
+    global _user_cache
+
+    if _user_cache is None:
+        _user_cache = LRUCache(
+            max_size=getattr(settings, 'JWT_USER_CACHE_MAX_SIZE', 1024),
+            timeout=getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 30)
+        )
+
+    return _user_cache
+
+
+def get_token_cache():
+    """
+    Returns the per-process cache of verified token payloads, creating it
+    from the `JWT_TOKEN_CACHE_MAX_SIZE` setting on first use.
+    """
+    global _token_cache
+
+    if _token_cache is None:
+        _token_cache = LRUCache(
+            max_size=getattr(settings, 'JWT_TOKEN_CACHE_MAX_SIZE', 4096)
+        )
+
+    return _token_cache
+
+
+def collect_metrics():
+    """Yields the hit, miss and size metrics of the user and token caches."""
+    for name, cache in (('user', _user_cache), ('token', _token_cache)):
+        if cache is not None:
+            yield from cache.metrics(name)
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached user with 'user_id', if any."""
+    if _user_cache is not None:
+        _user_cache.delete(user_id)
+
+
 class JWTAuthentication(authentication.BaseAuthentication):
     authentication_header_prefix = 'Token'
 
@@ -75,6 +127,32 @@ class JWTAuthentication(authentication.BaseAuthentication):
         Try to authenticate the given credentials. If authentcation is
         successful, return the user and token. If not, throw an error.
         """
+        payload = self._decode_token(token)
+        
+        user = self._get_user(payload['id'])
+        
+        if not user.is_active:
+            msg = 'This user has been deactivated.'
+            raise exceptions.AuthenticationFailed(msg)
+        
+        
+        return (user, token)
+
+    def _decode_token(self, token):
+        """
+        Verify 'token' and return its payload. With `JWT_TOKEN_CACHE_ENABLED`,
+        tokens that were already verified skip the signature check and JSON
+        parsing until they expire.
+        """
+        cache = None
+
+        if getattr(settings, 'JWT_TOKEN_CACHE_ENABLED', False):
+            cache = get_token_cache()
+            payload = cache.get(token)
+
+            if payload is not None:
+                return payload
+
         try:
             
             payload = jwt.decode(token, settings.SECRET_KEY)
@@ -83,17 +161,42 @@ class JWTAuthentication(authentication.BaseAuthentication):
             
             msg = 'Invalid authentication. Could not decode token.'
             raise exceptions.AuthenticationFailed(msg)
-        
+
+        # Only verified tokens are cached, and only until their `exp` claim,
+        # so a cached token is never accepted after `jwt.decode` would have
+        # rejected it as expired.
+        if cache is not None:
+            cache.set(token, payload, expires_at=payload.get('exp', None))
+
+        return payload
+
+    def _get_user(self, user_id):
+        """
+        Load the user together with their profile. With
+        `JWT_USER_CACHE_ENABLED`, the pair is served from a short-lived
+        per-process cache, so repeat requests hit the database not at all.
+        """
+        if not getattr(settings, 'JWT_USER_CACHE_ENABLED', False):
+            return self._load_user(user_id)
+
+        cache = get_user_cache()
+        cached = cache.get(user_id)
+
+        if cached is None:
+            user = self._load_user(user_id)
+            cached = (user, user.profile)
+            cache.set(user_id, cached)
+
+        # Every request gets its own copies, so changes a view makes to
+        # `request.user` never leak into other requests through the cache.
+        user, profile = copy.copy(cached[0]), copy.copy(cached[1])
+        user.profile = profile
+
+        return user
+
+    def _load_user(self, user_id):
         try:
-            user = User.objects.get(pk=payload['id'])
+            return User.objects.select_related('profile').get(pk=user_id)
         except User.DoesNotExist:
             msg = 'No user matching this token was found.'
             raise exceptions.AuthenticationFailed(msg)
-        
-        if not user.is_active:
-            msg = 'This user has been deactivated.'
-            raise exceptions.AuthenticationFailed(msg)
-        
-        
-        return (user, token)
-            
\ No newline at end of file
@@ -0,0 +1,158 @@
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, BasePasswordHasher, PBKDF2PasswordHasher, mask_hash,
+    must_update_salt
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+# The cost parameters of these hashers are read from the settings every time
+# they are used. Django re-hashes a password with the current parameters the
+# next time its owner logs in whenever `must_update` reports that the stored
+# hash was made with different ones, so tuning a cost in `settings.py` takes
+# effect gradually without invalidating anybody's password.
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """`PBKDF2PasswordHasher` with `PASSWORD_PBKDF2_ITERATIONS` iterations."""
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings, 'PASSWORD_PBKDF2_ITERATIONS',
+            PBKDF2PasswordHasher.iterations
+        )
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    `Argon2PasswordHasher` with the costs in `PASSWORD_ARGON2_TIME_COST`,
+    `PASSWORD_ARGON2_MEMORY_COST` and `PASSWORD_ARGON2_PARALLELISM`. Requires
+    the `argon2-cffi` package.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_TIME_COST',
+            Argon2PasswordHasher.time_cost
+        )
+
+    @property
+    def memory_cost(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_MEMORY_COST',
+            Argon2PasswordHasher.memory_cost
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_PARALLELISM',
+            Argon2PasswordHasher.parallelism
+        )
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """
+    Password hashing with scrypt from the standard library. The costs come
+    from `PASSWORD_SCRYPT_WORK_FACTOR`, `PASSWORD_SCRYPT_BLOCK_SIZE` and
+    `PASSWORD_SCRYPT_PARALLELISM`. Hashes use the same format as the scrypt
+    hasher that ships with later versions of Django.
+    """
+    algorithm = 'scrypt'
+
+    @property
+    def work_factor(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_BLOCK_SIZE', 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'PASSWORD_SCRYPT_PARALLELISM', 1)
+
+    def encode(self, password, salt, work_factor=None, block_size=None,
+               parallelism=None):
+        assert password is not None
+        assert salt and '$' not in salt
+
+        work_factor = work_factor or self.work_factor
+        block_size = block_size or self.block_size
+        parallelism = parallelism or self.parallelism
+
+        hash = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=work_factor,
+            r=block_size,
+            p=parallelism,
+            # scrypt needs 128 * n * r bytes. Allow twice that so the default
+            # 32 MiB limit of OpenSSL does not cap the work factor.
+            maxmem=256 * work_factor * block_size,
+            dklen=64,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+
+        return '%s$%d$%s$%d$%d$%s' % (
+            self.algorithm, work_factor, salt, block_size, parallelism, hash
+        )
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash = \
+            encoded.split('$', 5)
+        assert algorithm == self.algorithm
+
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password,
+            decoded['salt'],
+            decoded['work_factor'],
+            decoded['block_size'],
+            decoded['parallelism'],
+        )
+
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+
+        return (
+            decoded['work_factor'] != self.work_factor or
+            decoded['block_size'] != self.block_size or
+            decoded['parallelism'] != self.parallelism or
+            must_update_salt(decoded['salt'], self.salt_entropy)
+        )
+
+    def harden_runtime(self, password, encoded):
+        # The runtime of scrypt can not be padded out the way PBKDF2's
+        # iterations can.
+        pass
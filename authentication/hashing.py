@@ -0,0 +1,208 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password, get_hasher, identify_hasher, is_password_usable,
+    make_password
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_slots = None
+_lock = threading.Lock()
+_stats = {
+    'in_flight': 0,
+    'completed': 0,
+    'rejected': 0,
+    'wait_seconds_total': 0.0,
+    'wait_seconds_max': 0.0,
+}
+
+
+def is_pool_enabled():
+    return getattr(settings, 'PASSWORD_HASHING_POOL_ENABLED', False)
+
+
+def hash_password(raw_password):
+    """
+    Returns the hash of 'raw_password', computed on the hashing pool when
+    `PASSWORD_HASHING_POOL_ENABLED` is set.
+    """
+    if raw_password is None or not is_pool_enabled():
+        return make_password(raw_password)
+
+    return _run_in_pool(make_password, raw_password)
+
+
+def verify_password(raw_password, encoded, setter=None):
+    """
+    Works like `django.contrib.auth.hashers.check_password`, but verifies on
+    the hashing pool when `PASSWORD_HASHING_POOL_ENABLED` is set. 'setter' is
+    called with 'raw_password' when the hash is correct but was made with an
+    old hasher or old costs.
+    """
+    if not is_pool_enabled():
+        return check_password(raw_password, encoded, setter)
+
+    is_correct, must_update = _run_in_pool(
+        _check_password, raw_password, encoded
+    )
+
+    if setter and is_correct and must_update:
+        setter(raw_password)
+
+    return is_correct
+
+
+def get_pool_stats():
+    """Returns the queue depth and wait times of the hashing pool."""
+    with _lock:
+        return dict(_stats)
+
+
+def collect_metrics():
+    """Yields the stats of the hashing pool, once it has been started."""
+    if _pool is None:
+        return
+
+    stats = get_pool_stats()
+
+    yield ('password_hashing_in_flight', 'gauge', (), stats['in_flight'])
+    yield ('password_hashing_completed_total', 'counter', (),
+           stats['completed'])
+    yield ('password_hashing_rejected_total', 'counter', (),
+           stats['rejected'])
+    yield ('password_hashing_wait_seconds_total', 'counter', (),
+           stats['wait_seconds_total'])
+    yield ('password_hashing_wait_seconds_max', 'gauge', (),
+           stats['wait_seconds_max'])
+
+
+def _check_password(raw_password, encoded):
+    # Mirrors `check_password`, except that it reports whether the hash needs
+    # updating instead of calling a setter, which can not cross processes.
+    if raw_password is None or not is_password_usable(encoded):
+        return False, False
+
+    preferred = get_hasher('default')
+
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, False
+
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = hasher.verify(raw_password, encoded)
+
+    # Keep the time taken by wrong passwords in line with right ones, just as
+    # `check_password` does.
+    if not is_correct and not hasher_changed and must_update:
+        hasher.harden_runtime(raw_password, encoded)
+
+    return is_correct, must_update
+
+
+def _init_worker():
+    # Workers that are spawned rather than forked start without Django.
+    import django
+    django.setup()
+
+
+def _timed_call(fn, *args):
+    return time.time(), fn(*args)
+
+
+def _get_pool():
+    global _pool, _slots
+
+    with _lock:
+        if _pool is None:
+            size = getattr(settings, 'PASSWORD_HASHING_POOL_SIZE', 2)
+
+            # Forking a multithreaded server can copy locks held by other
+            # threads into the worker, so start workers from a fresh
+            # interpreter instead.
+            _pool = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+
+        if _slots is None:
+            size = getattr(settings, 'PASSWORD_HASHING_POOL_SIZE', 2)
+            queue_limit = getattr(settings, 'PASSWORD_HASHING_QUEUE_LIMIT', 8)
+
+            # A slot is held by every job that is running or waiting, so at
+            # most `queue_limit` jobs ever wait for a worker.
+            _slots = threading.BoundedSemaphore(size + queue_limit)
+
+        return _pool, _slots
+
+
+def _discard_pool(pool):
+    """Forget 'pool' once broken, so the next `_get_pool` starts a new one."""
+    global _pool
+
+    with _lock:
+        if _pool is pool:
+            _pool = None
+
+    pool.shutdown(wait=False)
+
+
+def _submit(pool, fn, *args):
+    try:
+        return pool.submit(_timed_call, fn, *args).result()
+    except BrokenProcessPool:
+        # A worker died, e.g. killed by the OOM killer, which breaks the
+        # whole executor. Replace it and try once more.
+        logger.warning('Password hashing pool is broken, restarting it.')
+        _discard_pool(pool)
+        pool, _ = _get_pool()
+
+        return pool.submit(_timed_call, fn, *args).result()
+
+
+def _run_in_pool(fn, *args):
+    pool, slots = _get_pool()
+
+    # Shed load straight away instead of letting requests pile up behind a
+    # queue of expensive hashes and starve every other endpoint.
+    if not slots.acquire(blocking=False):
+        with _lock:
+            _stats['rejected'] += 1
+
+        # Imported here because `core.exceptions` imports DRF's views, which
+        # import our authentication backend and, through it, the User model.
+        from core.exceptions import ServiceUnavailable
+
+        logger.warning('Password hashing queue is full, rejecting request.')
+        raise ServiceUnavailable()
+
+    with _lock:
+        _stats['in_flight'] += 1
+
+    try:
+        submitted_at = time.time()
+        started_at, result = _submit(pool, fn, *args)
+    finally:
+        slots.release()
+
+        with _lock:
+            _stats['in_flight'] -= 1
+
+    wait = max(started_at - submitted_at, 0.0)
+
+    with _lock:
+        _stats['completed'] += 1
+        _stats['wait_seconds_total'] += wait
+        _stats['wait_seconds_max'] = max(_stats['wait_seconds_max'], wait)
+
+    return result
@@ -9,6 +9,7 @@ from django.contrib.auth.models import (
 from django.db import models
 
 from core.models import TimestampedModel
+from .hashing import hash_password, verify_password
 
 
 class UserManager(BaseUserManager):
@@ -122,6 +123,27 @@ class User(AbstractBaseUser, PermissionsMixin, TimestampedModel):
         """
         return self._generate_jwt_token()
 
+    def set_password(self, raw_password):
+        """
+        Hashes 'raw_password' like Django does, but on the hashing pool when
+        one is enabled so slow hashes don't block the request thread.
+        """
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        Returns True if 'raw_password' is correct, re-hashing it with the
+        preferred hasher if needed. Uses the hashing pool when enabled.
+        """
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return verify_password(raw_password, self.password, setter)
+
     def get_full_name(self):
         """
         This method is required by Django for things like handling emails.
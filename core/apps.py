@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+    label = 'core'
+    verbose_name = 'Core'
+
+    def ready(self):
+        import core.signals
@@ -1,5 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.views import exception_handler
 
+
+class ServiceUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy. Please try again shortly.'
+    default_code = 'service_unavailable'
+
+
 def core_exception_handler(exc, context):
     # If an exception is thrown that we don't explicitly handle here, we want
     # to delegate to the default exception handler offered by DRF. If we do
@@ -8,6 +17,7 @@ def core_exception_handler(exc, context):
     response = exception_handler(exc, context)
     handlers = {
         'NotFound': _handle_not_found_error,
+        'ServiceUnavailable': _handle_generic_error,
         'ValidationError': _handle_generic_error
     }
     # This is how we identify the type of the current exception. We will use
@@ -0,0 +1,309 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+METRIC_HELP = {
+    'http_requests_total': 'Requests handled, by view, method and status.',
+    'http_request_duration_seconds':
+        'Time from the first middleware to the response, by view and method.',
+    'http_request_phase_seconds':
+        'Time spent in each phase of a request, by view. "db" is time in SQL '
+        'queries, "render" is time rendering the response, and "view" is the '
+        'rest of the time in the view, mostly serialization.',
+}
+
+
+def _get_buckets():
+    return tuple(getattr(settings, 'METRICS_BUCKETS', DEFAULT_BUCKETS))
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of the current process, updated in memory under
+    a lock so that recording a request stays cheap.
+
+    With `METRICS_DIR` set, the registry is written to a file of its own in
+    that directory every `METRICS_FLUSH_INTERVAL` seconds, so that the
+    `/metrics` endpoint of any worker can add up the metrics of all of them.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.buckets = _get_buckets()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = 0.0
+        self._lock = threading.Lock()
+        # Separate from `_lock`, so that recording requests never waits on
+        # a file being written.
+        self._flush_lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+
+        with self._lock:
+            histogram = self.histograms.get(key, None)
+
+            if histogram is None:
+                # One count per bucket, then the sum and the total count.
+                histogram = [0] * len(self.buckets) + [0.0, 0]
+                self.histograms[key] = histogram
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        """
+        Returns the registry, plus the current values of the
+        `METRICS_COLLECTORS`, as a JSON-serializable dict.
+        """
+        with self._lock:
+            counters = [
+                [name, labels, value]
+                for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, labels, list(values)]
+                for (name, labels), values in self.histograms.items()
+            ]
+
+        samples = []
+
+        for path in getattr(settings, 'METRICS_COLLECTORS', ()):
+            for name, kind, labels, value in import_string(path)():
+                samples.append([name, kind, labels, value])
+
+        return {
+            'pid': self.pid,
+            'buckets': list(self.buckets),
+            'counters': counters,
+            'histograms': histograms,
+            'samples': samples,
+        }
+
+    def flush(self, force=False):
+        """
+        Writes the snapshot to this process's file in `METRICS_DIR`, at most
+        once every `METRICS_FLUSH_INTERVAL` seconds unless 'force' is set.
+        """
+        directory = getattr(settings, 'METRICS_DIR', None)
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+
+        if directory is None:
+            return
+
+        # Threads of one worker share the file, so only one of them checks
+        # the interval and writes it at a time.
+        with self._flush_lock:
+            now = time.monotonic()
+
+            if not force and now - self.flushed_at < interval:
+                return
+
+            self.flushed_at = now
+            path = os.path.join(directory, 'metrics-{}.json'.format(self.pid))
+
+            os.makedirs(directory, exist_ok=True)
+
+            # A temporary file of its own, which readers skip because it
+            # does not end in `.json`.
+            fd, temporary_path = tempfile.mkstemp(
+                dir=directory, prefix='metrics-', suffix='.tmp'
+            )
+
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.snapshot(), f)
+
+                # Readers never see a half-written file.
+                os.replace(temporary_path, path)
+            except BaseException:
+                os.unlink(temporary_path)
+                raise
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Returns the registry of the current process. A worker forked from a
+    process that already had a registry starts a fresh one, so that the
+    parent's requests are not counted twice.
+    """
+    global _registry
+
+    with _registry_lock:
+        if _registry is None or _registry.pid != os.getpid():
+            _registry = MetricsRegistry()
+
+        return _registry
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def _read_snapshots():
+    registry = get_registry()
+    directory = getattr(settings, 'METRICS_DIR', None)
+
+    if directory is None:
+        return [registry.snapshot()]
+
+    registry.flush(force=True)
+    snapshots = []
+
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # The file of a worker that is exiting may vanish under us.
+            continue
+
+    return snapshots
+
+
+def aggregate():
+    """
+    Adds up the metrics of every process. Counters and histograms of workers
+    that have exited are kept, so totals never go backwards; their gauges
+    are dropped. Gauges whose name ends in `_max` take the maximum.
+    """
+    counters = {}
+    histograms = {}
+    samples = {}
+    buckets = _get_buckets()
+
+    for snapshot in _read_snapshots():
+        if tuple(snapshot['buckets']) != buckets:
+            # Written before the buckets were changed.
+            continue
+
+        is_alive = _is_alive(snapshot['pid'])
+
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(values))
+
+            for index, value in enumerate(values):
+                total[index] += value
+
+        for name, kind, labels, value in snapshot['samples']:
+            if kind == 'gauge' and not is_alive:
+                continue
+
+            key = (name, kind, tuple(map(tuple, labels)))
+
+            if name.endswith('_max'):
+                samples[key] = max(samples.get(key, value), value)
+            else:
+                samples[key] = samples.get(key, 0) + value
+
+    return buckets, counters, histograms, samples
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace(
+            '"', '\\"'
+        ).replace('\n', '\\n'))
+        for key, value in pairs
+    ) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """Returns every metric in the Prometheus text exposition format."""
+    buckets, counters, histograms, samples = aggregate()
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name in described:
+            return
+
+        described.add(name)
+
+        if name in METRIC_HELP:
+            lines.append('# HELP {} {}'.format(name, METRIC_HELP[name]))
+
+        lines.append('# TYPE {} {}'.format(name, kind))
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, 'counter')
+        lines.append('{}{} {}'.format(
+            name, _format_labels(labels), _format_value(value)
+        ))
+
+    for (name, labels), values in sorted(histograms.items()):
+        describe(name, 'histogram')
+        cumulative = 0
+
+        for bound, count in zip(buckets, values):
+            cumulative += count
+            lines.append('{}_bucket{} {}'.format(
+                name, _format_labels(labels, [('le', bound)]), cumulative
+            ))
+
+        lines.append('{}_bucket{} {}'.format(
+            name, _format_labels(labels, [('le', '+Inf')]), values[-1]
+        ))
+        lines.append('{}_sum{} {}'.format(
+            name, _format_labels(labels), _format_value(values[-2])
+        ))
+        lines.append('{}_count{} {}'.format(
+            name, _format_labels(labels), values[-1]
+        ))
+
+    for (name, kind, labels), value in sorted(samples.items()):
+        describe(name, kind)
+        lines.append('{}{} {}'.format(
+            name, _format_labels(labels), _format_value(value)
+        ))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,323 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.metrics import get_registry
+from core.routers import has_replica, read_from_replica
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised by `QueryBudgetMiddleware` in strict mode. It is an
+    `AssertionError` so that test runners report it as a failure.
+    """
+    pass
+
+
+class QueryCollector:
+    """
+    A database execute wrapper that counts the queries a block of code runs,
+    the time spent in them, and how often each statement is repeated.
+
+    Statements are compared before their parameters are bound, so the same
+    SELECT run for 20 different ids counts as one shape repeated 20 times.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql] += 1
+
+    def repeated(self, threshold):
+        """Returns `(sql, times)` pairs of statements run 'threshold'+ times."""
+        return [
+            (sql, times) for sql, times in self.shapes.most_common()
+            if times >= threshold
+        ]
+
+    def collect(self):
+        """
+        Returns a context manager that installs the collector on every
+        configured database connection.
+        """
+        stack = ExitStack()
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+
+        return stack
+
+
+def get_query_budget(method, view_name):
+    """
+    Returns the query budget of 'method' requests to the endpoint named
+    'view_name', falling back to `QUERY_BUDGET_DEFAULT`. None means there
+    is no budget.
+    """
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+
+    return budgets.get(
+        (method, view_name), getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    )
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the SQL queries and database time of every request and looks for
+    statements repeated `QUERY_REPEAT_THRESHOLD` or more times, the usual
+    sign of an N+1 query.
+
+    The results are added to the response as `X-Query-Count`,
+    `X-Query-Time` (milliseconds) and `X-Query-Repeats` (the number of
+    repeated statements), and logged to `core.middleware` with the details
+    in the record's `query_report` attribute. Requests over their budget or
+    with repeated statements are logged as warnings and, when
+    `QUERY_BUDGET_STRICT` is set, raise `QueryBudgetExceeded` instead of
+    returning a response.
+
+    Streamed responses, such as exports, are only counted up to the point
+    their view returns. The queries that produce their body run chunk by
+    chunk as it is sent, after the headers, and grow with its size by
+    design, so they are left out of the budget.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+
+        with collector.collect():
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match is not None else None
+        budget = get_query_budget(
+            request.method, view_name
+        ) if view_name else None
+        repeated = collector.repeated(
+            getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        )
+
+        report = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': collector.count,
+            'db_time_ms': round(collector.duration * 1000, 2),
+            'budget': budget,
+            'repeated': [
+                {'sql': sql, 'times': times} for sql, times in repeated
+            ],
+        }
+
+        response['X-Query-Count'] = str(collector.count)
+        response['X-Query-Time'] = str(report['db_time_ms'])
+        response['X-Query-Repeats'] = str(len(repeated))
+
+        over_budget = budget is not None and collector.count > budget
+
+        if not over_budget and not repeated:
+            logger.debug(
+                '%(method)s %(path)s ran %(queries)d queries in '
+                '%(db_time_ms)sms', report, extra={'query_report': report}
+            )
+            return response
+
+        logger.warning(
+            '%(method)s %(path)s ran %(queries)d queries in %(db_time_ms)sms '
+            '(budget: %(budget)s) with %(repeats)d repeated statements',
+            dict(report, repeats=len(repeated)),
+            extra={'query_report': report}
+        )
+
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            problems = []
+
+            if over_budget:
+                problems.append('{} queries, over the budget of {}'.format(
+                    collector.count, budget
+                ))
+
+            problems.extend(
+                'ran {} times: {}'.format(times, sql) for sql, times in repeated
+            )
+
+            raise QueryBudgetExceeded('{} {} ({}):\n{}'.format(
+                request.method, request.path, view_name, '\n'.join(problems)
+            ))
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, status code, database time, render time and
+    remaining view time of every request, labelled by the resolved view,
+    for the `/metrics` endpoint. Should come first in `MIDDLEWARE` so that
+    the latency covers the other middleware too.
+
+    Streamed responses are recorded once their body has been sent, so that
+    the latency and database time include the queries made while sending.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+        collector = QueryCollector()
+        request._metrics_timings = {}
+
+        with collector.collect():
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, started_at,
+                collector
+            )
+        else:
+            self.record(request, response, started_at, collector)
+
+        return response
+
+    def stream(self, content, request, response, started_at, collector):
+        try:
+            with collector.collect():
+                yield from content
+        finally:
+            self.record(request, response, started_at, collector)
+
+    def record(self, request, response, started_at, collector):
+        duration = time.perf_counter() - started_at
+        timings = request._metrics_timings
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+
+        registry = get_registry()
+        registry.inc('http_requests_total', (
+            ('view', view),
+            ('method', request.method),
+            ('status', str(response.status_code)),
+        ))
+        registry.observe('http_request_duration_seconds', (
+            ('view', view), ('method', request.method)
+        ), duration)
+        registry.observe('http_request_phase_seconds', (
+            ('view', view), ('phase', 'db')
+        ), collector.duration)
+
+        if 'view_started_at' in timings:
+            # Responses that are not rendered, such as streams, end their
+            # view phase when they have been sent.
+            view_ended_at = timings.get(
+                'render_started_at', started_at + duration
+            )
+            view_time = view_ended_at - timings['view_started_at']
+
+            registry.observe('http_request_phase_seconds', (
+                ('view', view), ('phase', 'view')
+            ), max(view_time - collector.duration, 0.0))
+            registry.observe('http_request_phase_seconds', (
+                ('view', view), ('phase', 'render')
+            ), timings.get('render_ended_at', view_ended_at) - view_ended_at)
+
+        try:
+            registry.flush()
+        except OSError:
+            # Metrics must never fail the request they describe.
+            logger.exception('Could not write metrics to METRICS_DIR')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_timings['view_started_at'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        timings = request._metrics_timings
+        timings['render_started_at'] = time.perf_counter()
+
+        def record_render_end(response):
+            timings['render_ended_at'] = time.perf_counter()
+
+        response.add_post_render_callback(record_render_end)
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves GET, HEAD and OPTIONS requests from the replica database through
+    `core.routers.ReplicaRouter`, and everything else from 'default'.
+
+    Replicas lag behind the primary, so after a client makes any other
+    request it gets a `REPLICA_STICKY_COOKIE` cookie that keeps its reads on
+    the primary for `REPLICA_STICKY_SECONDS`. Favoriting an article or
+    following a profile is then immediately visible in what it reads next.
+
+    Streamed responses run their queries while their body is sent, after
+    this middleware has returned, so their body is read from the replica
+    too.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not has_replica():
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.cookie_name = getattr(
+            settings, 'REPLICA_STICKY_COOKIE', 'use_primary'
+        )
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        if request.method not in self.SAFE_METHODS:
+            response = self.get_response(request)
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.sticky_seconds,
+                httponly=True, samesite='Lax'
+            )
+            return response
+
+        if self.cookie_name in request.COOKIES:
+            return self.get_response(request)
+
+        with read_from_replica():
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self.stream_from_replica(
+                response.streaming_content
+            )
+
+        return response
+
+    def stream_from_replica(self, content):
+        with read_from_replica():
+            yield from content
@@ -0,0 +1,138 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def get_count_cache():
+    return caches[getattr(settings, 'COUNT_CACHE_ALIAS', 'default')]
+
+
+def _get_generation(model, refresh=False):
+    # Every cached count embeds the current generation of its model. Bumping
+    # the generation orphans all of that model's counts at once, without
+    # having to know which filter combinations were cached. Generations are
+    # timestamps rather than counters so an evicted generation can never
+    # bring stale counts back.
+    cache = get_count_cache()
+    key = 'count:generation:' + model._meta.label_lower
+    generation = None if refresh else cache.get(key)
+
+    if generation is None:
+        generation = time.time_ns()
+        cache.set(key, generation, None)
+
+    return generation
+
+
+def invalidate_counts(model):
+    """Forget every cached count of 'model'."""
+    _get_generation(model, refresh=True)
+
+
+def get_cached_count(queryset, request, view, ignored_params=()):
+    """
+    Returns the number of rows in 'queryset', cached under the filters of
+    'request' for up to `COUNT_CACHE_TIMEOUT` seconds or until
+    `invalidate_counts` is called for its model.
+    """
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+        if key not in ignored_params
+    )
+    kwargs = sorted(view.kwargs.items()) if view is not None else []
+    parts = [repr(params), repr(kwargs), view.__class__.__name__]
+
+    # Views like the feed count different rows for every user.
+    if getattr(view, 'count_cache_vary_on_user', False):
+        parts.append(str(request.user.pk))
+
+    digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    key = 'count:{}:{}:{}'.format(
+        queryset.model._meta.label_lower,
+        _get_generation(queryset.model),
+        digest
+    )
+
+    cache = get_count_cache()
+    count = cache.get(key)
+
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, getattr(settings, 'COUNT_CACHE_TIMEOUT', 300))
+
+    return count
+
+
+class CachedCountLimitOffsetPagination(LimitOffsetPagination):
+    """
+    `LimitOffsetPagination` that reuses cached counts instead of running an
+    exact `COUNT(*)` for every page.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+
+        return super(CachedCountLimitOffsetPagination, self).paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_count(self, queryset):
+        return get_cached_count(
+            queryset, self.request, self.view,
+            ignored_params=(self.limit_query_param, self.offset_query_param)
+        )
+
+
+class TimestampedCursorPagination(CursorPagination):
+    """
+    Keyset pagination over `TimestampedModel`'s reverse-chronological order.
+
+    Unlike `LimitOffsetPagination`, a page is fetched with a
+    `created_at < cursor` range condition, so deep pages cost the same as the
+    first one and no exact `COUNT(*)` is needed. `id` breaks ties between
+    rows created in the same microsecond.
+    """
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+
+        if getattr(settings, 'PAGINATION_CURSOR_COUNT', True):
+            self.count = get_cached_count(
+                queryset, request, view,
+                ignored_params=(self.cursor_query_param,)
+            )
+
+        return super(TimestampedCursorPagination, self).paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('prev', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class TimestampedPaginationMixin:
+    """
+    Lets list views of `TimestampedModel`s switch between offset and cursor
+    pagination with the `PAGINATION_MODE` setting.
+    """
+
+    @property
+    def pagination_class(self):
+        if getattr(settings, 'PAGINATION_MODE', 'offset') == 'cursor':
+            return TimestampedCursorPagination
+
+        return api_settings.DEFAULT_PAGINATION_CLASS
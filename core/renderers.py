@@ -1,8 +1,14 @@
 import json
 
+from rest_framework.compat import SHORT_SEPARATORS
 from rest_framework.renderers import JSONRenderer
 from rest_framework.utils.serializer_helpers import ReturnList
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class CoreJSONRenderer(JSONRenderer):
     charset = 'utf-8'
     object_label = 'object'
@@ -39,22 +45,73 @@ class CoreJSONRenderer(JSONRenderer):
     """
     
     def render(self, data, media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
         if data.get('results', None) is not None:
-            # json.dumps python 객체를 json 문자열로 변환
-            return json.dumps({
-                self.pagination_object_label: data['results'],
-                self.pagination_object_count: data['count']
-            })
+            payload = {self.pagination_object_label: data['results']}
+
+            # Cursor pagination only knows an approximate count, and only
+            # when counting is turned on. It links pages with `next`/`prev`.
+            if data.get('count', None) is not None:
+                payload[self.pagination_object_count] = data['count']
+
+            if 'prev' in data:
+                payload['next'] = data['next']
+                payload['prev'] = data['prev']
             
         # If the view throws an error (such as the user can't be authenticated
-        # or something similar), 'data' will contain an 'errors' key. We want
-        # the default JSONRenderer to handle rendering errors, so we need to
-        # check for this case.
+        # or something similar), 'data' will contain an 'errors' key. Errors
+        # are rendered as they are, without wrapping them in our label.
         
         elif data.get('errors', None) is not None:
-            return super(CoreJSONRenderer, self).render(data)
+            payload = data
         
         else:
-            return json.dumps({
-                self.object_label: data
-            })
\ No newline at end of file
+            payload = {self.object_label: data}
+
+        return self.dumps(payload)
+
+    def render_stream(self, chunks):
+        """
+        Yield the same envelope `render` produces for a page, piece by piece,
+        for an iterable of lists of serialized objects. Only one chunk is held
+        in memory at a time, and the count is emitted once all rows are out.
+        """
+        count = 0
+
+        yield b'{' + self.dumps(self.pagination_object_label) + b':['
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+
+            if count:
+                yield b','
+
+            # Drop the surrounding brackets so the chunks join into one list.
+            yield self.dumps(chunk)[1:-1]
+            count += len(chunk)
+
+        yield b'],' + self.dumps(self.pagination_object_count) + \
+            b':' + str(count).encode('utf-8') + b'}'
+
+    def dumps(self, payload):
+        """
+        Encode 'payload' to UTF-8 JSON bytes in a single pass, using orjson
+        when it is installed and the standard library otherwise. Anything
+        neither understands natively goes through DRF's `JSONEncoder`.
+        """
+        if orjson is not None:
+            return orjson.dumps(
+                payload,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+
+        return json.dumps(
+            payload,
+            cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            separators=SHORT_SEPARATORS
+        ).encode('utf-8')
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def has_replica():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Sends the reads made inside the block to the replica, until the first
+    write. Used by `ReplicaRoutingMiddleware` around safe requests.
+    """
+    token = _reading_from_replica.set(True)
+
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends writes to 'default', and reads to the 'replica' database inside
+    `read_from_replica()`. Once a block has written anything, its reads go
+    to 'default' too, so that it always sees its own writes.
+
+    Does nothing unless a database named 'replica' is configured.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not has_replica():
+            return None
+
+        # Answer 'default' explicitly too, or Django would keep reading
+        # related objects from the database their parent came from.
+        return REPLICA_ALIAS if _reading_from_replica.get() else 'default'
+
+    def db_for_write(self, model, **hints):
+        if _reading_from_replica.get():
+            _reading_from_replica.set(False)
+
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
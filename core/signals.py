@@ -0,0 +1,42 @@
+import django
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, *args, **kwargs):
+    # Pragmas only last as long as the connection, except `journal_mode`,
+    # which is stored in the database file, so every new connection needs
+    # them again.
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, *args, **kwargs):
+    # Django 4.1 checks connections with `CONN_HEALTH_CHECKS` itself. Before
+    # that, a persistent connection dropped by the server or a pooler is only
+    # noticed when a query fails, so check reused connections here and close
+    # broken ones; the first query of the request then reconnects.
+    if django.VERSION >= (4, 1):
+        return
+
+    for connection in connections.all():
+        if connection.connection is None or \
+                not connection.settings_dict.get('CONN_HEALTH_CHECKS', False):
+            continue
+
+        if not connection.is_usable():
+            connection.close()
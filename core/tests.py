@@ -0,0 +1,289 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from articles.api.serializers import ArticleSerializer, CommentSerializer
+from articles.api.views import ArticleViewSet
+from articles.models import Article, Comment
+from articles.tests import create_articles, create_user
+from core.metrics import MetricsRegistry, get_registry
+from core.middleware import (
+    MetricsMiddleware, QueryBudgetExceeded, ReplicaRoutingMiddleware
+)
+from core.routers import _reading_from_replica
+from core.serializers import CompiledRepresentationMixin
+from core.signals import check_persistent_connections
+from profiles.api.serializers import ProfileSerializer
+
+
+def drf_to_representation(self, instance):
+    return serializers.Serializer.to_representation(self, instance)
+
+
+class CompiledRepresentationTests(TestCase):
+    """
+    `CompiledRepresentationMixin` must render exactly what DRF's own
+    `to_representation` does, nested serializers included, for every
+    serializer that uses it.
+    """
+
+    def setUp(self):
+        self.viewer = create_user('viewer')
+        self.author = create_user('author')
+        self.other = create_user('other')
+
+        # One author with a bio and an image, one with neither.
+        self.author.profile.bio = 'Writes things.'
+        self.author.profile.image_url = 'https://example.com/author.png'
+        self.author.profile.save()
+
+        self.viewer.profile.follow(self.author.profile)
+
+        self.articles = create_articles(self.author, 2) + create_articles(
+            self.other, 1, tags=()
+        )
+        self.viewer.profile.favorite(self.articles[0])
+
+        self.comments = [
+            Comment.objects.create(
+                article=self.articles[0], author=profile, body='Comment'
+            )
+            for profile in (self.author.profile, self.other.profile)
+        ]
+
+        request = APIRequestFactory().get('/')
+        request.user = self.viewer
+        self.context = {'request': request}
+
+    def assertSameRepresentation(self, serializer_class, instances):
+        compiled = serializer_class(
+            instances, many=True, context=self.context
+        ).data
+
+        with mock.patch.object(
+            CompiledRepresentationMixin, 'to_representation',
+            drf_to_representation
+        ):
+            expected = serializer_class(
+                instances, many=True, context=self.context
+            ).data
+
+        self.assertEqual(compiled, expected)
+        self.assertEqual(
+            [list(row) for row in compiled], [list(row) for row in expected]
+        )
+
+    def test_articles(self):
+        articles = Article.objects.select_related(
+            'author', 'author__user'
+        ).with_tags(names_only=True).with_favorites(self.viewer.profile)
+
+        self.assertSameRepresentation(ArticleSerializer, list(articles))
+
+    def test_articles_without_annotations(self):
+        self.assertSameRepresentation(
+            ArticleSerializer, list(Article.objects.all())
+        )
+
+    def test_comments(self):
+        self.assertSameRepresentation(CommentSerializer, self.comments)
+
+    def test_profiles(self):
+        self.assertSameRepresentation(ProfileSerializer, [
+            self.author.profile, self.other.profile, self.viewer.profile
+        ])
+
+    def test_profiles_anonymous(self):
+        self.context = {}
+
+        self.assertSameRepresentation(ProfileSerializer, [
+            self.author.profile, self.other.profile
+        ])
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.user = create_user('viewer')
+        self.author = create_user('author')
+        self.article = create_articles(self.author, 1)[0]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.user.token)
+
+    def test_reports_queries_in_headers(self):
+        response = self.client.get('/articles/title')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertEqual(response['X-Query-Repeats'], '0')
+        self.assertIn('X-Query-Time', response)
+
+    def test_writes_stay_within_their_budgets(self):
+        response = self.client.post('/articles/title', {
+            'title': 'Title',
+            'description': 'Description',
+            'body': 'Body',
+            'tagList': ['one', 'two', 'three'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.put(
+            '/articles/title/' + self.article.slug,
+            {'title': 'New title', 'tagList': ['four', 'five']},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(
+            '/articles/title/{}/favorite'.format(self.article.slug)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={
+        ('GET', 'articles.api.views.TagListAPIView'): 0
+    })
+    def test_over_budget_fails(self):
+        with self.assertLogs('core.middleware', 'WARNING'), \
+                self.assertRaisesMessage(QueryBudgetExceeded, 'over the budget'):
+            self.client.get('/articles/tags')
+
+    @override_settings(QUERY_BUDGETS={
+        ('POST', 'articles.api.views.TagListAPIView'): 0
+    })
+    def test_budgets_are_per_method(self):
+        response = self.client.get('/articles/tags')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_statement_fails(self):
+        create_articles(self.author, 5)
+
+        # Without the tags prefetch, every article loads its own tags.
+        queryset = ArticleViewSet.queryset.prefetch_related(None)
+
+        with mock.patch.object(ArticleViewSet, 'queryset', queryset), \
+                self.assertLogs('core.middleware', 'WARNING'), \
+                self.assertRaisesMessage(QueryBudgetExceeded, 'ran 6 times'):
+            self.client.get('/articles/title')
+
+
+class ConnectionHealthCheckTests(TestCase):
+    def setUp(self):
+        connection.ensure_connection()
+        self.settings_dict = mock.patch.dict(
+            connection.settings_dict, {'CONN_HEALTH_CHECKS': True}
+        )
+        self.settings_dict.start()
+        self.addCleanup(self.settings_dict.stop)
+
+    def test_broken_connection_is_closed(self):
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            check_persistent_connections(sender=self.__class__)
+
+        close.assert_called_once_with()
+
+    def test_usable_connection_is_kept(self):
+        with mock.patch.object(connection, 'close') as close:
+            check_persistent_connections(sender=self.__class__)
+
+        close.assert_not_called()
+
+
+class MetricsFlushTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_concurrent_flushes_do_not_collide(self):
+        registry = MetricsRegistry()
+        registry.inc('http_requests_total', ())
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(20):
+                    registry.flush(force=True)
+            except Exception as error:
+                errors.append(error)
+
+        with self.settings(METRICS_DIR=self.directory):
+            threads = [threading.Thread(target=flush) for _ in range(8)]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.directory), [
+            'metrics-{}.json'.format(registry.pid)
+        ])
+
+    def test_write_errors_do_not_fail_requests(self):
+        with self.settings(METRICS_ENABLED=True, METRICS_DIR=self.directory), \
+                mock.patch.object(
+                    get_registry(), 'flush', side_effect=PermissionError
+                ), \
+                self.assertLogs('core.middleware', 'ERROR'):
+            response = self.client.get('/articles/tags')
+
+        self.assertEqual(response.status_code, 200)
+
+
+class StreamingResponseTests(TestCase):
+    """
+    The body of a streamed response is produced after the middleware has
+    returned it, and must still be routed and measured like the rest of the
+    request.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.request = APIRequestFactory().get('/articles/export')
+        self.request.resolver_match = None
+        self.chunks_read_from_replica = []
+
+    def get_response(self, request):
+        def chunks():
+            for chunk in ('[', ']'):
+                self.chunks_read_from_replica.append(
+                    _reading_from_replica.get()
+                )
+                Article.objects.count()
+                yield chunk
+
+        return StreamingHttpResponse(chunks())
+
+    def test_stream_is_read_from_replica(self):
+        with mock.patch('core.middleware.has_replica', return_value=True):
+            middleware = ReplicaRoutingMiddleware(self.get_response)
+
+        response = middleware(self.request)
+        self.assertEqual(self.chunks_read_from_replica, [])
+
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+        self.assertEqual(self.chunks_read_from_replica, [True, True])
+        self.assertFalse(_reading_from_replica.get())
+
+    @override_settings(METRICS_ENABLED=True, METRICS_DIR=None)
+    def test_stream_is_recorded_once_sent(self):
+        middleware = MetricsMiddleware(self.get_response)
+
+        with mock.patch.object(MetricsMiddleware, 'record') as record:
+            response = middleware(self.request)
+            record.assert_not_called()
+
+            b''.join(response.streaming_content)
+
+        record.assert_called_once()
+        collector = record.call_args[0][-1]
+        self.assertEqual(collector.count, 2)
@@ -1,7 +1,153 @@
+import itertools
 import random
 import string
+import threading
+import time
+from collections import OrderedDict
+
+from django.utils.text import slugify
 
 DEFAULT_CHAR_STRING = string.ascii_lowercase + string.digits
+BASE36_CHAR_STRING = string.digits + string.ascii_lowercase
 
 def generate_random_string(chars=DEFAULT_CHAR_STRING, size=6):
     return ''.join(random.choice(chars) for _ in range(size))
+
+
+def to_base36(number):
+    digits = []
+
+    while True:
+        number, remainder = divmod(number, 36)
+        digits.append(BASE36_CHAR_STRING[remainder])
+
+        if not number:
+            break
+
+    return ''.join(reversed(digits))
+
+
+_suffix_counter = itertools.count()
+
+
+def generate_unique_suffix():
+    """
+    Returns a short, time-ordered string that is unique without asking the
+    database: the current time in microseconds, a per-process counter and a
+    random part, all in base 36. Two suffixes can only collide if they are
+    made in the same microsecond, with the same counter value modulo 1296,
+    and draw the same random characters.
+    """
+    timestamp = to_base36(time.time_ns() // 1000)
+    counter = to_base36(next(_suffix_counter) % 36 ** 2).rjust(2, '0')
+
+    return timestamp + counter + generate_random_string(size=2)
+
+
+def unique_slugify(value, max_length=255):
+    """
+    Slugify 'value' and append `generate_unique_suffix()`, cutting the slug
+    so the result fits in 'max_length' characters.
+    """
+    suffix = generate_unique_suffix()
+    slug = slugify(value)[:max_length - len(suffix) - 1].rstrip('-')
+
+    if not slug:
+        return suffix
+
+    return slug + '-' + suffix
+
+
+def chunked(iterable, size):
+    """Yields lists of up to 'size' consecutive items of 'iterable'."""
+    chunk = []
+
+    for item in iterable:
+        chunk.append(item)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+class LRUCache:
+    """
+    A small thread-safe, per-process LRU cache whose entries also expire.
+
+    Entries expire 'timeout' seconds after they are set, or at the absolute
+    `time.time()` given to `set` as 'expires_at', whichever comes first. The
+    least recently used entry is evicted once 'max_size' entries are stored.
+    Hits and misses are counted so the cache can be monitored.
+    """
+
+    def __init__(self, max_size=1024, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is not None and entry[1] is not None \
+                    and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[0]
+
+    def set(self, key, value, expires_at=None):
+        if self.timeout is not None:
+            timeout_at = time.time() + self.timeout
+            expires_at = timeout_at if expires_at is None \
+                else min(expires_at, timeout_at)
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+    def metrics(self, name):
+        """
+        Returns the stats as `(metric, kind, labels, value)` samples for
+        `METRICS_COLLECTORS`, labelled with the cache 'name'.
+        """
+        stats = self.stats()
+        labels = (('cache', name),)
+
+        return [
+            ('cache_hits_total', 'counter', labels, stats['hits']),
+            ('cache_misses_total', 'counter', labels, stats['misses']),
+            ('cache_entries', 'gauge', labels, stats['size']),
+        ]
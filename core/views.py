@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from core.metrics import render_metrics
+
+
+def metrics(request):
+    """
+    Serves the metrics of every worker in the Prometheus text exposition
+    format. Returns 404 unless `METRICS_ENABLED` is set.
+    """
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
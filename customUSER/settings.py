@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,6 +28,9 @@ SECRET_KEY = 'django-insecure-)xt(lwrm*ydu2-=%9p8t!_ss7e=#&xmgy@wnxspfmbfzx+j9=1
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Whether we are running under `manage.py test`.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = []
 
 # Application definition
@@ -40,6 +46,7 @@ INSTALLED_APPS = [
     'authentication',
     'profiles',
     'articles',
+    'core',
     
     'django_extensions',
     
@@ -47,6 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,6 +97,72 @@ DATABASES = {
     }
 }
 
+# With a 'replica' database, safe requests read from it and everything else
+# uses 'default'; see `core.routers.ReplicaRouter`. To try it locally, set
+# `SQLITE_REPLICA_PATH`, run `python manage.py migrate --database replica`
+# and copy the primary file over the replica to "replicate". Tests use
+# 'default' for both.
+if os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SQLITE_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# After a request that may write, the client reads from the primary for
+# this many seconds, long enough for the replica to catch up. List counts
+# cached from a lagging replica can stay stale until the next write or
+# `COUNT_CACHE_TIMEOUT`.
+REPLICA_STICKY_COOKIE = 'use_primary'
+REPLICA_STICKY_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+#
+# 'counts' holds the cached counts of paginated lists, and 'shared' the
+# popular tags with the version stamp behind their Last-Modified date. Both
+# must be shared by every worker, or a write only invalidates the entries
+# of the worker that handled it. They default to file-based caches under
+# `CACHE_DIR`, outside the source tree, which every worker on the host can
+# see; production settings can point them at memcached or the database.
+# Tests use local memory instead, so they never see entries left by the
+# development server or by earlier runs.
+
+CACHE_DIR = os.environ.get(
+    'CACHE_DIR', os.path.join(tempfile.gettempdir(), 'customUSER-cache')
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'counts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'counts'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'shared'),
+    },
+}
+
+if TESTING:
+    for alias in ('counts', 'shared'):
+        CACHES[alias] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': alias,
+        }
+
+COUNT_CACHE_ALIAS = 'counts'
+
+# Upper bound, in seconds, on how long a cached count is reused. Creating or
+# deleting articles and comments invalidates counts straight away.
+COUNT_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -107,6 +183,53 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+#
+# `PASSWORD_HASHING_POLICY` picks the hasher for new passwords: 'pbkdf2'
+# (default), 'scrypt' or 'argon2' (needs `argon2-cffi`). The other hashers
+# stay installed so existing hashes still verify, and Django re-hashes a
+# password with the preferred hasher and costs on its owner's next login.
+
+PASSWORD_HASHING_POLICY = os.environ.get('PASSWORD_HASHING_POLICY', 'pbkdf2')
+
+_PASSWORD_HASHERS_BY_POLICY = {
+    'pbkdf2': 'authentication.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'authentication.hashers.ScryptPasswordHasher',
+    'argon2': 'authentication.hashers.TunedArgon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS_BY_POLICY[PASSWORD_HASHING_POLICY]] + [
+    hasher for policy, hasher in _PASSWORD_HASHERS_BY_POLICY.items()
+    if policy != PASSWORD_HASHING_POLICY
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+
+PASSWORD_SCRYPT_WORK_FACTOR = int(
+    os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14)
+)
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 1
+
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 102400
+PASSWORD_ARGON2_PARALLELISM = 8
+
+# Hash and verify passwords on a pool of `PASSWORD_HASHING_POOL_SIZE` worker
+# processes instead of the request thread. Once `PASSWORD_HASHING_QUEUE_LIMIT`
+# jobs are waiting for a worker, further registrations and logins are
+# answered with 503 straight away.
+PASSWORD_HASHING_POOL_ENABLED = False
+PASSWORD_HASHING_POOL_SIZE = 2
+PASSWORD_HASHING_QUEUE_LIMIT = 8
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -136,7 +259,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'authentication.backends.JWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CachedCountLimitOffsetPagination',
     'EXCEPTION_HANDLER': 'core.exceptions.core_exception_handler',
     'NON_FIELD_ERRORS_KEY': 'error',
     'PAGE_SIZE': 20,
@@ -144,3 +267,110 @@ REST_FRAMEWORK = {
 
 APPEND_SLASH=False
 
+# Dotted path of the backend behind `?q=` article search. None picks the
+# backend matching the default database: SQLite FTS5 or PostgreSQL tsvector.
+ARTICLES_SEARCH_BACKEND = None
+
+# `articles/tags?popular` returns this many tags unless a number is given,
+# and caches them in the `POPULAR_TAGS_CACHE_ALIAS` cache for up to
+# `POPULAR_TAGS_CACHE_TIMEOUT` seconds. Changing the tags of any article
+# invalidates the cache straight away, for every worker sharing that cache;
+# with a per-process cache such as locmem, other workers keep serving the
+# old tags until the timeout.
+POPULAR_TAGS_CACHE_ALIAS = 'shared'
+POPULAR_TAGS_LIMIT = 20
+POPULAR_TAGS_CACHE_TIMEOUT = 300
+
+# Tag filters look tag ids up by slug once and then keep them in a
+# per-process cache. Renaming or deleting a tag clears the cache in the
+# process that made the change; other processes see it after at most
+# `TAG_ID_CACHE_TIMEOUT` seconds.
+TAG_ID_CACHE_TIMEOUT = 300
+TAG_ID_CACHE_MAX_SIZE = 10000
+
+# Article and comment exports stream their rows, reading and serializing
+# this many at a time.
+EXPORT_CHUNK_SIZE = 500
+
+# Cache authenticated users and their profiles in each process, so that
+# `JWTAuthentication` does not query the database on every request. Saving
+# or deleting a user or profile evicts the entry in the process that made
+# the change; other processes see it after at most `JWT_USER_CACHE_TIMEOUT`
+# seconds.
+JWT_USER_CACHE_ENABLED = False
+JWT_USER_CACHE_TIMEOUT = 30
+JWT_USER_CACHE_MAX_SIZE = 1024
+
+# Remember tokens whose signature has already been verified, until they
+# expire, so repeat requests with the same token skip `jwt.decode`.
+JWT_TOKEN_CACHE_ENABLED = False
+JWT_TOKEN_CACHE_MAX_SIZE = 4096
+
+# Article, feed and comment lists use `LimitOffsetPagination` ('offset') by
+# default. 'cursor' switches them to keyset pagination over
+# (-created_at, -id), which links pages with `next`/`prev` cursors instead of
+# running an exact COUNT(*) on every page.
+PAGINATION_MODE = 'offset'
+
+# Whether 'cursor' mode includes the (cached) count in list responses.
+PAGINATION_CURSOR_COUNT = True
+
+# How `ArticlesFeedAPIView` builds a user's feed. 'pull' joins articles
+# against the user's follows on every request. 'push' reads the `FeedEntry`
+# timeline, which is filled when articles are created or authors followed.
+# Run `python manage.py backfill_feed` after switching to 'push'.
+ARTICLES_FEED_STRATEGY = 'pull'
+
+# `QueryBudgetMiddleware` counts the queries and database time of every
+# request, reports them in `X-Query-*` response headers, and logs requests
+# that exceed their budget or repeat one statement
+# `QUERY_REPEAT_THRESHOLD` or more times (an N+1 query). Under
+# `manage.py test` these raise instead, failing the test that made the
+# request.
+QUERY_BUDGET_STRICT = TESTING
+QUERY_BUDGET_ENABLED = DEBUG or QUERY_BUDGET_STRICT
+QUERY_REPEAT_THRESHOLD = 5
+
+# Maximum queries per request, keyed by HTTP method and URL name, or the
+# dotted path of the view for unnamed URLs. Writes get budgets of their own,
+# since they also save, index and invalidate. Budgets include the queries
+# of token authentication. `QUERY_BUDGET_DEFAULT` applies to any other
+# endpoint; None disables the budget.
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGETS = {
+    ('GET', 'article-list'): 8,
+    ('POST', 'article-list'): 14,
+    ('GET', 'article-detail'): 6,
+    ('PUT', 'article-detail'): 20,
+    ('GET', 'articles.api.views.ArticlesFeedAPIView'): 8,
+    ('GET', 'articles.api.views.CommentsListCreateAPIView'): 8,
+    ('POST', 'articles.api.views.CommentsListCreateAPIView'): 6,
+    ('DELETE', 'articles.api.views.CommentsDestroyAPIView'): 7,
+    ('POST', 'articles.api.views.ArticlesFavoriteAPIView'): 16,
+    ('DELETE', 'articles.api.views.ArticlesFavoriteAPIView'): 15,
+    ('GET', 'articles.api.views.TagListAPIView'): 3,
+    ('GET', 'profiles.api.views.ProfileRetrieveAPIView'): 5,
+    ('POST', 'profiles.api.views.ProfileFollowAPIView'): 9,
+    ('DELETE', 'profiles.api.views.ProfileFollowAPIView'): 7,
+}
+
+# `MetricsMiddleware` records per-view latency histograms, status codes and
+# the time spent in queries, in the view and in rendering, served at
+# `/metrics` in the Prometheus text format. Each worker process writes its
+# metrics to a file in `METRICS_DIR` at most every `METRICS_FLUSH_INTERVAL`
+# seconds, and `/metrics` adds up the files of all workers. With
+# `METRICS_DIR = None` only the serving process is reported. Empty the
+# directory when the server starts, as files of exited workers are kept.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '') == '1'
+METRICS_DIR = os.environ.get('METRICS_DIR', None)
+METRICS_FLUSH_INTERVAL = 5
+METRICS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Functions returning extra `(name, kind, labels, value)` samples to export.
+METRICS_COLLECTORS = [
+    'authentication.backends.collect_metrics',
+    'authentication.hashing.collect_metrics',
+    'articles.models.collect_metrics',
+]
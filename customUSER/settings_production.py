@@ -0,0 +1,167 @@
+"""
+Production settings for customUSER project.
+
+Use with `DJANGO_SETTINGS_MODULE=customUSER.settings_production`. Everything
+that differs between deployments is read from the environment; the rest is
+inherited from `customUSER.settings`.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import (
+    BASE_DIR, CACHE_DIR, CACHES, QUERY_BUDGET_STRICT, TESTING
+)
+
+
+def _get_env(name, default=None, required=False):
+    value = os.environ.get(name, default)
+
+    if required and not value:
+        raise ImproperlyConfigured(
+            'The {} environment variable must be set.'.format(name)
+        )
+
+    return value
+
+
+def _get_env_bool(name, default=False):
+    return _get_env(name, '1' if default else '0').lower() in (
+        '1', 'true', 'yes', 'on'
+    )
+
+
+SECRET_KEY = _get_env('DJANGO_SECRET_KEY', required=True)
+
+# With DEBUG on, Django keeps every executed query in memory.
+DEBUG = _get_env_bool('DJANGO_DEBUG')
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in _get_env('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()
+]
+
+# The base settings enable the query budget middleware because DEBUG is on
+# there; it has no place in production.
+QUERY_BUDGET_ENABLED = QUERY_BUDGET_STRICT
+
+
+# Database
+#
+# `DATABASE_ENGINE` is 'sqlite' (default) or 'postgresql'. PostgreSQL needs
+# `psycopg2`, which is not in requirements.txt.
+#
+# `CONN_MAX_AGE` keeps each worker's connection open for that many seconds
+# instead of connecting on every request. With `CONN_HEALTH_CHECKS`, a
+# reused connection is checked when a request starts and replaced if the
+# server closed it. Django 4.1+ does this itself; on older versions the
+# check is done by `core.signals`.
+
+DATABASE_ENGINE = _get_env('DATABASE_ENGINE', 'sqlite')
+CONN_MAX_AGE = int(_get_env('DATABASE_CONN_MAX_AGE', 60))
+CONN_HEALTH_CHECKS = _get_env_bool('DATABASE_CONN_HEALTH_CHECKS', True)
+
+if DATABASE_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': _get_env('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': CONN_HEALTH_CHECKS,
+        }
+    }
+elif DATABASE_ENGINE == 'postgresql':
+    # Django 3.2 has no connection pool of its own. To pool connections
+    # across workers, point `POSTGRES_HOST`/`POSTGRES_PORT` at pgbouncer in
+    # transaction mode and set `POSTGRES_PGBOUNCER=1`: server-side cursors
+    # do not survive transaction pooling, so they are disabled.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': _get_env('POSTGRES_DB', required=True),
+            'USER': _get_env('POSTGRES_USER', ''),
+            'PASSWORD': _get_env('POSTGRES_PASSWORD', ''),
+            'HOST': _get_env('POSTGRES_HOST', ''),
+            'PORT': _get_env('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': CONN_HEALTH_CHECKS,
+            'DISABLE_SERVER_SIDE_CURSORS': _get_env_bool('POSTGRES_PGBOUNCER'),
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        'Unknown DATABASE_ENGINE {!r}.'.format(DATABASE_ENGINE)
+    )
+
+# Safe requests read from this replica when `POSTGRES_REPLICA_HOST` is set;
+# see `core.routers.ReplicaRouter`.
+if DATABASE_ENGINE == 'postgresql' and _get_env('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=_get_env('POSTGRES_REPLICA_HOST'),
+        PORT=_get_env('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        TEST={'MIRROR': 'default'},
+    )
+
+# Applied to every new SQLite connection by `core.signals`. WAL lets reads
+# run alongside a write, and `synchronous = NORMAL` is safe in WAL mode while
+# saving an fsync per transaction. `busy_timeout` (milliseconds) makes a
+# writer wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(_get_env('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'busy_timeout': int(_get_env('SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
+
+# Cache
+#
+# The 'counts' and 'shared' caches must be shared by every worker.
+# `CACHE_BACKEND` picks how:
+#
+# - 'file' (default): files under `CACHE_DIR`. Shared only by the workers of
+#   one host.
+# - 'memcached': the servers in `CACHE_LOCATION`, comma separated. Needs
+#   `pymemcache`, which is not in requirements.txt.
+# - 'database': tables `cache_counts` and `cache_shared` in the default
+#   database. Create them with `python manage.py createcachetable`.
+
+CACHE_BACKEND = _get_env('CACHE_BACKEND', 'file')
+
+
+def _get_shared_cache(alias):
+    if CACHE_BACKEND == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, alias),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+
+    if CACHE_BACKEND == 'memcached':
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': _get_env('CACHE_LOCATION', required=True).split(','),
+            'KEY_PREFIX': alias,
+        }
+
+    if CACHE_BACKEND == 'database':
+        return {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_' + alias,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+
+    raise ImproperlyConfigured(
+        'Unknown CACHE_BACKEND {!r}.'.format(CACHE_BACKEND)
+    )
+
+
+if not TESTING:
+    CACHES = dict(
+        CACHES,
+        counts=_get_shared_cache('counts'),
+        shared=_get_shared_cache('shared'),
+    )
@@ -16,10 +16,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('authentication.api.urls'), name='authentication'),
     path('profiles/', include('profiles.api.urls'), name='profiles'),
     path('articles/', include('articles.api.urls'), name='ariticles'),
+    path('metrics', metrics, name='metrics'),
 ]
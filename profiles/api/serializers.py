@@ -1,8 +1,38 @@
 from rest_framework import serializers
+
+from core.serializers import CompiledRepresentationMixin
 from profiles.models import Profile
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+def resolve_following(context, profiles):
+    """
+    Work out which of 'profiles' the requesting user follows with a single
+    query and memoize the answer on the serializer 'context'.
+
+    Nested serializers share the context of their parent, so calling this
+    once per page lets every `ProfileSerializer` on that page answer
+    `following` without touching the database.
+    """
+    request = context.get('request', None)
+
+    if request is None or not request.user.is_authenticated:
+        return context
+
+    following = context.setdefault('following', {})
+    profiles = [profile for profile in profiles if profile.pk not in following]
+
+    if profiles:
+        following_ids = request.user.profile.following_ids(profiles)
+
+        for profile in profiles:
+            following[profile.pk] = profile.pk in following_ids
+
+    return context
+
+
+class ProfileSerializer(
+    CompiledRepresentationMixin, serializers.ModelSerializer
+    ):
     # The Serializer class is itself a type of Field, and can be used to
     # represent relationships where one object type is nested inside another.
     username = serializers.CharField(source='user.username')
@@ -31,6 +61,12 @@ class ProfileSerializer(serializers.ModelSerializer):
         if not request.user.is_authenticated:
             return False
         
+        # `resolve_following` memoizes the answer for every profile on the
+        # page. Profiles it did not see still get their own query.
+        following = self.context.get('following', {})
+        if instance.pk in following:
+            return following[instance.pk]
+        
         follower = request.user.profile
         followee = instance
         
@@ -7,7 +7,7 @@ from rest_framework.views import APIView
 
 from profiles.models import Profile
 from .renderers import ProfileJSONRenderer
-from .serializers import ProfileSerializer
+from .serializers import ProfileSerializer, resolve_following
 
 
 class ProfileRetrieveAPIView(RetrieveAPIView):
@@ -31,9 +31,8 @@ class ProfileRetrieveAPIView(RetrieveAPIView):
             # raise ProfileDoesNotExist
             raise NotFound('A profile with this username does not exist.')
         
-        serializer = self.serializer_class(profile, context={
-            'request':request
-        })
+        serializer_context = resolve_following({'request': request}, [profile])
+        serializer = self.serializer_class(profile, context=serializer_context)
         
         return Response(serializer.data, status=status.HTTP_200_OK)
 
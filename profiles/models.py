@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from core.models import TimestampedModel
 
 # Create your models here.
@@ -51,17 +53,55 @@ class Profile(TimestampedModel):
         """Returns True if we're following 'profile'; False otherwise."""
         return self.follows.filter(pk=profile.pk).exists()
     
+    def following_ids(self, profiles):
+        """Returns the pks of those 'profiles' we're following, in one query."""
+        return set(self.follows.filter(
+            pk__in=[profile.pk for profile in profiles]
+        ).values_list('pk', flat=True))
+    
     def is_followed_by(self, profile):
         """Returns True if 'profile' is following us; False otherwise."""
         return self.followed_by.filter(pk=profile.pk).exists()
     
     def favorite(self, article):
         """Favorite 'article' if we haven't already favorited it."""
-        self.favorites.add(article)
+        with transaction.atomic():
+            self._lock_article(article)
+
+            if self.has_favorited(article):
+                return
+
+            self.favorites.add(article)
+            self._update_favorites_count(article, 1)
     
     def unfavorite(self, article):
         """Unfavorite 'article' if we've already favorited it."""
-        self.favorites.remove(article)
+        with transaction.atomic():
+            self._lock_article(article)
+
+            if not self.has_favorited(article):
+                return
+
+            self.favorites.remove(article)
+            self._update_favorites_count(article, -1)
+
+    def _lock_article(self, article):
+        # Concurrent (un)favorites of the same article queue up on the row
+        # lock, so each one checks `has_favorited` after the previous one
+        # committed and the counter moves once per change.
+        type(article).objects.select_for_update().filter(
+            pk=article.pk
+        ).values_list('pk').first()
+
+    def _update_favorites_count(self, article, delta):
+        # Update the counter in the database rather than saving 'article', so
+        # concurrent favorites can not overwrite each other's increments. The
+        # counter never drops below zero, even on databases such as SQLite
+        # that ignore `select_for_update`.
+        type(article).objects.filter(pk=article.pk).update(
+            favorites_count=Greatest(F('favorites_count') + delta, 0)
+        )
+        article.refresh_from_db(fields=['favorites_count'])
     
     def has_favorited(self, article):
         """Returns True if we have favorited 'article'; else False."""